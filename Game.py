@@ -1,6 +1,14 @@
 # main.py
+import os
+import time
 import pygame
+import controls
+from concurrent.futures import ThreadPoolExecutor
 from settings import *
+from replay import Recorder, held_keys
+from profiler import FrameProfiler
+from fonts import get_font
+from hud import GlyphAtlas, draw_centered
 from levels.level1 import Level1
 from levels.level2 import Level2
 from levels.level3 import Level3
@@ -9,6 +17,14 @@ from levels.level5 import Level5
 from levels.level6 import Level6
 from levels.level7 import Level7
 from levels.level8 import Level8
+from levels.level_endless import EndlessMaze
+
+# Every level in play order. Each entry is called to build its level, so a
+# level only exists while it is being played (or prepared to be played next).
+LEVEL_FACTORIES = (
+    Level1, Level2, Level3, Level4,
+    Level5, Level6, Level7, Level8,
+)
 
 
 # --- Helper function to format time ---
@@ -36,36 +52,69 @@ class Game:
         self.start_time = 0
         self.game_timer_running = False
         self.final_time = 0
-        # Use a common system font, size 30
-        self.timer_font = pygame.font.SysFont(None, 30)
-        self.menu_font = pygame.font.SysFont(None, 60)
-        self.title_font = pygame.font.SysFont(None, 40)
+        # Use a common system font, size 30 (shared through the font registry)
+        self.timer_font = get_font(None, 30)
+        self.menu_font = get_font(None, 60)
+        self.title_font = get_font(None, 40)
+        # Digits and separators for the in-game timer, rendered once
+        self.timer_glyphs = GlyphAtlas(self.timer_font, WHITE)
         # --- END NEW ---
 
-        # All available levels
-        self.all_levels = [
-            Level1(), Level2(), Level3(), Level4(),
-            Level5(), Level6(), Level7(), Level8()
-        ]
+        # Levels are built on demand. The next one is prepared on a background
+        # thread while the current one is played (or while the menu is shown).
+        self.level_factories = LEVEL_FACTORIES
+        self.loader = ThreadPoolExecutor(max_workers=1)
+        self.prefetched = {}  # level index -> Future building that level
         self.current_level_index = 0
-        self.current_level = self.all_levels[self.current_level_index]
+        self.current_level = None
+        self.prefetch_level(0)
+
+        # Replay of the level being played (only with RECORD_REPLAYS)
+        self.recorder = None
+        self.pending_presses = set()  # Keys pressed since the last recorded tick
 
         # Level transition
         self.transition_timer = 0
         self.transition_duration = FPS * 2  # 2 seconds
 
+        # Frame profiler overlay, toggled with F3
+        self.profiler = FrameProfiler()
+
+        # Dirty-rectangle rendering state
+        self.last_screen_key = None  # Which screen was presented last frame
+        self.timer_rect = None  # Where the timer was drawn last frame
+        self.timer_dirty_rects = []
+
     def run(self):
+        """
+        Runs the game with a fixed timestep: the level is always updated at FPS
+        ticks per second of real time, however fast frames are drawn.
+        If the machine falls behind, at most MAX_CATCH_UP_STEPS ticks are run
+        before the next draw and the rest of the backlog is dropped.
+        """
+        step_ms = 1000 / FPS
+        accumulator = 0.0
+        self.clock.tick()
         running = True
+        profiler = self.profiler
         while running:
+            accumulator += self.clock.tick(RENDER_FPS)
+            profiler.mark("wait")
+
             # --- Event Handling ---
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.toggle(self.current_level)
+                    self.last_screen_key = None  # Redraw everything, with or without the overlay
 
                 if self.game_state == "PLAYING":
                     # Only send events to the level if playing
                     if self.transition_timer == 0:
                         self.current_level.handle_event(event)
+                        if self.recorder is not None and event.type == pygame.KEYDOWN:
+                            self.pending_presses.add(event.key)
                 elif self.game_state == "MENU":
                     if event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_SPACE:
@@ -75,37 +124,114 @@ class Game:
                                 self.start_time = pygame.time.get_ticks()
                                 self.game_timer_running = True
                             # --- END NEW ---
-                            self.transition_timer = self.transition_duration  # Show "Level 1"
+                            self.start_level(self.current_level_index)  # Show "Level 1"
+                        if event.key == pygame.K_e:
+                            self.start_endless()
                         if event.key == pygame.K_q:
                             running = False
                 elif self.game_state == "WON":
                     if event.type == pygame.KEYDOWN:
                         running = False
 
+            profiler.mark("events")
+
             # --- Game Logic ---
-            if self.game_state == "PLAYING":
-                if self.transition_timer > 0:
-                    self.transition_timer -= 1
-                else:
-                    self.current_level.update()
+            steps = 0
+            while accumulator >= step_ms and steps < MAX_CATCH_UP_STEPS:
+                self.step()
+                accumulator -= step_ms
+                steps += 1
+            if steps == MAX_CATCH_UP_STEPS:
+                # Too far behind: drop the backlog instead of spiralling
+                accumulator = min(accumulator, step_ms)
+            profiler.mark("update")
 
-                if self.current_level.is_complete:
-                    self.load_next_level()
+            if steps == 0:
+                # Nothing changed since the last draw, so wait for the next tick
+                pygame.time.wait(int(step_ms - accumulator))
+                continue
 
             # --- Drawing ---
-            self.screen.fill(BLACK)
-            self.draw()  # Call the main draw method
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            if DIRTY_RECTS and not profiler.enabled:
+                self.present()
+            else:
+                self.screen.fill(BLACK)
+                self.draw()  # Call the main draw method
+                if profiler.enabled:
+                    profiler.draw(self.screen)  # The overlay counts as drawing
+                profiler.mark("draw")
+                pygame.display.flip()
+            profiler.mark("present")
+            profiler.end_frame()
 
+        self.save_replay()
+        self.loader.shutdown(wait=False, cancel_futures=True)
         pygame.quit()
 
+    def step(self):
+        """Advances the game by one simulation tick."""
+        if self.game_state == "PLAYING":
+            if self.transition_timer > 0:
+                self.transition_timer -= 1
+            else:
+                if self.recorder is not None:
+                    self.recorder.record(held_keys(controls.get_pressed()), self.pending_presses)
+                    self.pending_presses = set()
+                self.current_level.update()
+                if self.recorder is not None:
+                    self.recorder.tick_done()
+
+            if self.current_level.is_complete:
+                self.load_next_level()
+
+    def prefetch_level(self, index):
+        """Starts building level `index` in the background, if there is such a level."""
+        if index < len(self.level_factories) and index not in self.prefetched:
+            self.prefetched[index] = self.loader.submit(self.level_factories[index])
+
+    def start_level(self, index):
+        """
+        Makes level `index` the current one and shows its banner. The level is
+        taken from the background loader (waiting only if it isn't ready yet),
+        and the level after it starts loading right away.
+        """
+        self.prefetch_level(index)
+        self.current_level_index = index
+        self.current_level = self.prefetched.pop(index).result()
+        self.prefetch_level(index + 1)
+        self.profiler.watch(self.current_level)
+        self.start_recording()
+        self.transition_timer = self.transition_duration
+
+    def start_endless(self):
+        """Starts the endless maze mode (untimed, and it never completes)."""
+        self.game_state = "PLAYING"
+        self.current_level = EndlessMaze()
+        self.profiler.watch(self.current_level)
+        self.start_recording()
+        self.transition_timer = self.transition_duration
+
+    def start_recording(self):
+        """Saves the replay of the previous level, if any, and starts one for the current level."""
+        self.save_replay()
+        if RECORD_REPLAYS:
+            self.recorder = Recorder(self.current_level)
+            self.pending_presses = set()
+
+    def save_replay(self):
+        """Writes the current level's replay to REPLAY_DIR."""
+        if self.recorder is None or self.recorder.ticks == 0:
+            return
+        replay = self.recorder.finish()
+        self.recorder = None
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{replay.level}-{replay.seed}.replay")
+        replay.save(path)
+        print(f"Replay saved to {path}")
+
     def load_next_level(self):
-        if self.current_level_index < len(self.all_levels) - 1:
-            self.current_level_index += 1
-            self.current_level = self.all_levels[self.current_level_index]
-            self.transition_timer = self.transition_duration
+        if self.current_level_index < len(self.level_factories) - 1:
+            self.start_level(self.current_level_index + 1)
         else:
             # --- NEW: Stop timer on win ---
             if self.game_timer_running:
@@ -114,6 +240,38 @@ class Game:
             # --- END NEW ---
             self.game_state = "WON"
 
+    def present(self):
+        """
+        Draws the frame and pushes only the changed regions to the display.
+        Static screens (menu, win, level banner) are drawn once and then only the
+        timer is refreshed. Levels report their own dirty regions, and a full
+        update happens whenever the screen changes or the camera scrolls.
+        """
+        in_level = self.game_state == "PLAYING" and self.transition_timer == 0
+        screen_key = (self.game_state, in_level, self.current_level_index, id(self.current_level))
+        full_redraw = screen_key != self.last_screen_key
+        self.last_screen_key = screen_key
+
+        if not in_level and not full_redraw:
+            # Nothing but the timer moves on a static screen
+            if self.timer_rect:
+                self.screen.fill(BLACK, self.timer_rect)
+            dirty = self.draw_timer()
+            if dirty:
+                pygame.display.update(dirty)
+            return
+
+        self.screen.fill(BLACK)
+        self.draw()
+        if in_level:
+            rects = self.current_level.get_dirty_rects()
+            if rects is None:
+                full_redraw = True
+        if full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects + self.timer_dirty_rects)
+
     def draw(self):
         if self.game_state == "MENU":
             self.draw_main_menu()
@@ -122,56 +280,50 @@ class Game:
         elif self.game_state == "PLAYING":
             if self.transition_timer > 0:
                 # Show "Level X" text
-                level_text = f"Level {self.current_level_index + 1}"
-                text_surf = self.menu_font.render(level_text, True, WHITE)
-                text_rect = text_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-                self.screen.blit(text_surf, text_rect)
+                level_text = self.current_level.title or f"Level {self.current_level_index + 1}"
+                draw_centered(self.screen, self.menu_font, level_text, WHITE, (WIDTH // 2, HEIGHT // 2))
             else:
                 # Draw the current level
                 self.current_level.draw(self.screen)
 
-            # --- NEW: Draw the running timer ---
-            if self.game_timer_running:
-                # Calculate elapsed time
-                elapsed_time = pygame.time.get_ticks() - self.start_time
-                time_str = format_time(elapsed_time)
+            self.timer_dirty_rects = self.draw_timer()
 
-                text_surf = self.timer_font.render(time_str, True, WHITE)
-                # Blit to top-left corner
-                self.screen.blit(text_surf, (10, 10))
-            # --- END NEW ---
+    def draw_timer(self):
+        """
+        Draws the running timer in the top-left corner from the pre-rendered glyphs.
+        Returns the screen regions it touched (this frame's and last frame's text).
+        """
+        if not self.game_timer_running:
+            return []
 
-    def draw_main_menu(self):
-        title_surf = self.menu_font.render("Temple Ruins", True, WHITE)
-        title_rect = title_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
+        # Calculate elapsed time
+        elapsed_time = pygame.time.get_ticks() - self.start_time
+        time_str = format_time(elapsed_time)
 
-        start_surf = self.title_font.render("Press SPACE to Start", True, GREEN)
-        start_rect = start_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        # Blit to top-left corner
+        rect = self.timer_glyphs.draw(self.screen, time_str, (10, 10))
 
-        quit_surf = self.title_font.render("Press Q to Quit", True, RED)
-        quit_rect = quit_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 50))
+        dirty = [rect]
+        if self.timer_rect:
+            dirty.append(self.timer_rect)
+        self.timer_rect = rect
+        return dirty
 
-        self.screen.blit(title_surf, title_rect)
-        self.screen.blit(start_surf, start_rect)
-        self.screen.blit(quit_surf, quit_rect)
+    def draw_main_menu(self):
+        draw_centered(self.screen, self.menu_font, "Temple Ruins", WHITE, (WIDTH // 2, HEIGHT // 2 - 100))
+        draw_centered(self.screen, self.title_font, "Press SPACE to Start", GREEN, (WIDTH // 2, HEIGHT // 2))
+        draw_centered(self.screen, self.title_font, "Press E for Endless Maze", BLUE, (WIDTH // 2, HEIGHT // 2 + 50))
+        draw_centered(self.screen, self.title_font, "Press Q to Quit", RED, (WIDTH // 2, HEIGHT // 2 + 100))
 
     def draw_win_screen(self):
-        title_surf = self.menu_font.render("YOU WIN!", True, GREEN)
-        title_rect = title_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
+        draw_centered(self.screen, self.menu_font, "YOU WIN!", GREEN, (WIDTH // 2, HEIGHT // 2 - 100))
 
         # --- NEW: Display Final Time ---
         time_str = f"Final Time: {format_time(self.final_time)}"
-        time_surf = self.title_font.render(time_str, True, WHITE)
-        time_rect = time_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        draw_centered(self.screen, self.title_font, time_str, WHITE, (WIDTH // 2, HEIGHT // 2))
         # --- END NEW ---
 
-        quit_surf = self.title_font.render("Press any key to quit", True, WHITE)
-        quit_rect = quit_surf.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 100))
-
-        self.screen.blit(title_surf, title_rect)
-        self.screen.blit(time_surf, time_rect)
-        self.screen.blit(quit_surf, quit_rect)
-
+        draw_centered(self.screen, self.title_font, "Press any key to quit", WHITE, (WIDTH // 2, HEIGHT // 2 + 100))
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,174 @@
+# bench.py
+"""
+Benchmarks Level.update() and Level.draw() for every level. Each level is
+built headlessly, driven by the same fixed input for every run, and update
+and draw are timed separately, frame by frame.
+
+    python bench.py                          # Every level, plus the stress variants
+    python bench.py --frames 5000 --output results.json
+    python bench.py --compare results.json   # Show the change against an earlier run
+    python bench.py --only Level3            # Just the rows whose name starts with Level3
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import time
+from simulator import Simulator, random_inputs
+from replay import Replay, decode_keys, level_classes
+import pygame
+from settings import *
+from levels.level1 import Level1
+from levels.level3 import Level3
+from levels.level4 import Level4
+
+# Scaled-up versions of levels, to see how each subsystem grows with size:
+# (name, level class, class attributes to override)
+STRESS_VARIANTS = (
+    ("Level1 maze 201x201", Level1, {"maze_size": (201, 201)}),
+    ("Level1 maze 1001x1001", Level1, {"maze_size": (1001, 1001)}),  # Past WALL_LAYER_MAX_TILES
+    ("Level3 200 hazards", Level3, {"hazard_count": 200}),
+    ("Level3 2000 hazards", Level3, {"hazard_count": 2000}),  # Batched if NumPy is installed
+    ("Level4 200 enemies", Level4, {"enemy_count": 200}),
+    ("Level4 2000 enemies", Level4, {"enemy_count": 2000}),
+)
+
+
+def percentile(ordered, p):
+    """The p-th percentile (0-100) of an already sorted list, by nearest rank."""
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples_ns):
+    """p50/p95/p99, mean and max of a list of timings, in microseconds."""
+    ordered = sorted(samples_ns)
+    return {
+        "p50_us": percentile(ordered, 50) / 1000,
+        "p95_us": percentile(ordered, 95) / 1000,
+        "p99_us": percentile(ordered, 99) / 1000,
+        "mean_us": sum(ordered) / len(ordered) / 1000 if ordered else 0,
+        "max_us": ordered[-1] / 1000 if ordered else 0,
+    }
+
+
+def bench_level(name, factory, inputs, warmup=60):
+    """
+    Builds a level and plays `inputs` (a list of (held, presses) pairs, one per
+    frame) through it, timing every update and every draw. The first `warmup`
+    frames (which fill caches such as the wall layer) are left out of the stats.
+    """
+    clock = time.perf_counter_ns
+    start = clock()
+    sim = Simulator(factory)
+    build_ns = clock() - start
+    level = sim.level
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    updates, draws = [], []
+
+    for frame, (held, presses) in enumerate(inputs):
+        t0 = clock()
+        sim.step(held, presses)
+        t1 = clock()
+        level.draw(surface)
+        t2 = clock()
+        if frame >= warmup:
+            updates.append(t1 - t0)
+            draws.append(t2 - t1)
+        if level.is_complete:
+            break
+
+    return {
+        "name": name,
+        "build_ms": build_ns / 1e6,
+        "frames": len(updates),
+        "update": summarize(updates),
+        "draw": summarize(draws),
+    }
+
+
+def benchmarks(stress=True):
+    """Every (name, factory) pair to run: the levels in play order, then the stress variants."""
+    rows = [(name, cls) for name, cls in level_classes().items()]
+    if stress:
+        for name, cls, attributes in STRESS_VARIANTS:
+            rows.append((name, type(cls.__name__, (cls,), attributes)))
+    return rows
+
+
+def print_table(results, baseline=None):
+    old = {r["name"]: r for r in baseline["results"]} if baseline else {}
+    header = f"{'':26} {'build':>8} | {'update p50':>10} {'p95':>8} {'p99':>8} | {'draw p50':>9} {'p95':>8} {'p99':>8}"
+    print(header + ("  | change (update/draw p50)" if old else ""))
+    print("-" * len(header))
+    for r in results:
+        u, d = r["update"], r["draw"]
+        line = (f"{r['name']:26} {r['build_ms']:6.1f}ms | {u['p50_us']:8.1f}us {u['p95_us']:8.1f} {u['p99_us']:8.1f}"
+                f" | {d['p50_us']:7.1f}us {d['p95_us']:8.1f} {d['p99_us']:8.1f}")
+        prev = old.get(r["name"])
+        if prev:
+            changes = []
+            for phase in ("update", "draw"):
+                before = prev[phase]["p50_us"]
+                changes.append(f"{(r[phase]['p50_us'] / before - 1) * 100:+.0f}%" if before else "n/a")
+            line += "  | " + " / ".join(changes)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark update() and draw() of every level.")
+    parser.add_argument("--frames", type=int, default=3000, help="frames to run per level")
+    parser.add_argument("--warmup", type=int, default=60, help="frames to leave out of the stats")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the levels and the input")
+    parser.add_argument("--replay", help="drive every level with the input of this replay instead")
+    parser.add_argument("--only", help="only run rows whose name starts with this")
+    parser.add_argument("--no-stress", action="store_true", help="skip the stress variants")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved earlier with --output")
+    args = parser.parse_args()
+
+    if args.replay:
+        inputs = [decode_keys(state) for state in Replay.load(args.replay).states()][:args.frames]
+    else:
+        # Presses are derived from the held keys, as the Simulator would
+        inputs, previous = [], frozenset()
+        for held in random_inputs(random.Random(args.seed), args.frames):
+            inputs.append((held, held - previous))
+            previous = held
+
+    results = []
+    for name, cls in benchmarks(stress=not args.no_stress):
+        if args.only and not name.startswith(args.only):
+            continue
+        # Levels print as they are played; keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(bench_level(name, lambda: cls(args.seed), inputs, args.warmup))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "replay": args.replay,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
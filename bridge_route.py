@@ -0,0 +1,202 @@
+# bridge_route.py
+"""
+Fastest-route solver for levels with timed bridges (Level6). Finds the
+earliest tick the player can reach the exit door and the moves that get
+there, including the waits for bridges to come back.
+
+    python bridge_route.py              # Fastest route through Level6
+    python bridge_route.py --in-bounds  # Only count routes that stay on the map
+"""
+import argparse
+import math
+import time
+from settings import *
+from levels.level_base import BRIDGE
+
+DIRECTIONS = {(1, 0): "right", (-1, 0): "left", (0, 1): "down", (0, -1): "up"}
+
+
+class Route:
+    """
+    The result of solve_route(). `moves` are (tick, dx, dy): the update on which
+    the arrow key is held and the direction. The player is on the door after
+    update `arrival`.
+    """
+
+    def __init__(self, moves, arrival, leaves_map):
+        self.moves = moves
+        self.arrival = arrival
+        self.leaves_map = leaves_map  # Whether the route walks off the edge of the map
+
+    def __len__(self):
+        return len(self.moves)
+
+    @property
+    def seconds(self):
+        return self.arrival / FPS
+
+
+class _Board:
+    """
+    The level's tiles as bits of one Python int, so a whole set of tiles moves
+    one step with a few shifts. Rows are `stride` bits apart: the map, a
+    one-tile margin all around it (tiles outside the grid are never blocked, so
+    the player can walk there) and one always-blocked column that stops shifts
+    from wrapping into the next row.
+    """
+
+    def __init__(self, grid, bridges, in_bounds):
+        self.w, self.h = grid.w, grid.h
+        self.stride = self.w + 3
+        bridge_tiles = {(b.x, b.y) for b in bridges}
+        self.open = 0  # Tiles that are never blocked
+        for y in range(-1, self.h + 1):
+            for x in range(-1, self.w + 1):
+                inside = 0 <= x < self.w and 0 <= y < self.h
+                if not inside and in_bounds:
+                    continue
+                # The bridges' own flags are ignored: their state comes from the tick
+                if (x, y) not in bridge_tiles and not grid.flags_at(x, y) & grid.mask & ~BRIDGE:
+                    self.open |= 1 << self.bit(x, y)
+
+        # Bridges on the same schedule always flip together, so they share one mask
+        groups = {}  # Schedule -> [a bridge on it, mask of all its tiles]
+        for b in bridges:
+            group = groups.setdefault((b.solid_duration, b.vanish_duration, b.offset), [b, 0])
+            group[1] |= 1 << self.bit(b.x, b.y)
+        self.groups = list(groups.values())
+        # After the last offset every bridge repeats with the LCM of their periods
+        self.settle = max((b.offset for b in bridges), default=0)
+        self.period = math.lcm(*(b.period for b in bridges)) if bridges else 1
+        self._passable = {}
+
+    def bit(self, x, y):
+        return (y + 1) * self.stride + x + 1
+
+    def xy(self, bit):
+        return bit % self.stride - 1, bit // self.stride - 1
+
+    def passable(self, tick):
+        """Bitmask of the tiles the player can step onto on `tick`."""
+        if tick >= self.settle:
+            tick = self.settle + (tick - self.settle) % self.period
+        mask = self._passable.get(tick)
+        if mask is None:
+            mask = self.open
+            for bridge, tiles in self.groups:
+                if bridge.is_solid_at(tick):
+                    mask |= tiles
+            self._passable[tick] = mask
+        return mask
+
+    def step(self, tiles, passable):
+        """All tiles one move away from `tiles` that are passable."""
+        s = self.stride
+        return (tiles << 1 | tiles >> 1 | tiles << s | tiles >> s) & passable
+
+
+def solve_route(level, in_bounds=False, max_ticks=None):
+    """
+    Finds the earliest arrival at the level's door, searching over (tile, tick)
+    with the player's move cooldown as the cost of a step.
+
+    The player may move on any update once its cooldown has run out (the first
+    is update 1, after the bridges have updated), into a tile that is passable
+    on that update. Waiting in place is always allowed, so the tiles the player
+    can stand on ready to move only ever grow: they are kept as one bitmask,
+    and each tick is a handful of shifts and ANDs. With `in_bounds`, the tiles
+    around the map count as abyss.
+    Returns a Route, or None if the door can't be reached.
+    """
+    cooldown = level.player.move_cooldown
+    board = _Board(level.get_obstacles(), level.bridges, in_bounds)
+    if max_ticks is None:
+        max_ticks = board.settle + 2 * board.period + cooldown
+    start = board.bit(level.player.x, level.player.y)
+    door = 1 << board.bit(level.door.x, level.door.y)
+
+    ready = 1 << start  # Tiles the player can be on with its cooldown over
+    reached = ready  # Tiles ready now or arriving soon
+    arriving = {}  # Tick -> tiles the player reaches, ready to move, on that tick
+    came_from = {}  # Bit -> (previous bit, tick of the move)
+    last_change = 0
+    tick = level.scheduler.now + 1
+    end = tick + max_ticks
+
+    while tick < end:
+        ready |= arriving.pop(tick, 0)
+        moved = board.step(ready, board.passable(tick))
+        new = moved & ~reached
+        if new:
+            last_change = tick
+            reached |= new
+            arriving[tick + cooldown] = new
+            while new:
+                low = new & -new
+                new ^= low
+                i = low.bit_length() - 1
+                for j in (i - 1, i + 1, i - board.stride, i + board.stride):
+                    if j >= 0 and ready >> j & 1:
+                        came_from[i] = (j, tick)
+                        break
+            if moved & door:
+                break
+        elif not arriving and tick - last_change > board.period + board.settle:
+            return None  # A whole period went by with nothing new: the door is out of reach
+        tick += 1
+    else:
+        return None
+
+    moves = []
+    i = door.bit_length() - 1
+    while i != start:
+        j, when = came_from[i]
+        (x1, y1), (x2, y2) = board.xy(j), board.xy(i)
+        moves.append((when, x2 - x1, y2 - y1))
+        i = j
+    moves.reverse()
+
+    leaves_map = False
+    x, y = level.player.x, level.player.y
+    for _, dx, dy in moves:
+        x, y = x + dx, y + dy
+        leaves_map = leaves_map or not (0 <= x < board.w and 0 <= y < board.h)
+    return Route(moves, tick, leaves_map)
+
+
+def describe(route, cooldown, first_tick=1):
+    """The route as lines of 'tick: direction', with the waits for bridges between moves."""
+    lines = []
+    ready = first_tick
+    for tick, dx, dy in route.moves:
+        if tick > ready:
+            lines.append(f"        wait {tick - ready} ticks")
+        lines.append(f"  {tick:5d}: {DIRECTIONS[(dx, dy)]}")
+        ready = tick + cooldown
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest route through the bridge level.")
+    parser.add_argument("--in-bounds", action="store_true", help="don't let the route leave the map")
+    parser.add_argument("--moves", action="store_true", help="print every move of the route")
+    args = parser.parse_args()
+
+    from levels.level6 import Level6
+    level = Level6()
+    start = time.perf_counter()
+    route = solve_route(level, in_bounds=args.in_bounds)
+    elapsed = (time.perf_counter() - start) * 1000
+    if route is None:
+        print(f"Level6: the door can't be reached ({elapsed:.1f} ms)")
+        return
+    print(f"Level6: door reached on tick {route.arrival} ({route.seconds:.2f}s), "
+          f"{len(route)} moves, solved in {elapsed:.1f} ms")
+    if route.leaves_map:
+        print("  The route walks off the edge of the map (use --in-bounds to forbid it)")
+    if args.moves:
+        print("\n".join(describe(route, level.player.move_cooldown)))
+
+
+if __name__ == "__main__":
+    main()
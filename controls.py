@@ -0,0 +1,60 @@
+# controls.py
+import pygame
+
+# Levels read held keys through get_pressed() here instead of calling
+# pygame.key.get_pressed() themselves, so something other than the keyboard
+# (the headless Simulator, a replay, a bot) can drive them.
+
+
+class KeyboardInput:
+    """The real keyboard. Needs an initialised pygame display."""
+
+    def get_pressed(self):
+        return pygame.key.get_pressed()
+
+
+class KeyState:
+    """
+    A set of held keys that can be indexed like the result of
+    pygame.key.get_pressed(): state[pygame.K_LEFT] is True while K_LEFT is held.
+    """
+
+    __slots__ = ("held",)
+
+    def __init__(self, held=()):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ScriptedInput:
+    """Input that holds whichever keys it was last told to. Set `state` before every tick."""
+
+    def __init__(self):
+        self.state = KeyState()
+
+    def get_pressed(self):
+        return self.state
+
+
+_source = KeyboardInput()
+
+
+def get_pressed():
+    """Returns the keys held right now, from the current input source."""
+    return _source.get_pressed()
+
+
+def get_source():
+    return _source
+
+
+def set_source(source):
+    """
+    Makes `source` (anything with a get_pressed() method) the input every level
+    reads from. Returns the previous source so it can be put back.
+    """
+    global _source
+    previous, _source = _source, source
+    return previous
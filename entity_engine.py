@@ -0,0 +1,135 @@
+# entity_engine.py
+import pygame
+from settings import *
+
+# NumPy is optional: without it levels keep updating their enemies one object at a time.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def should_batch(count):
+    """Returns True if a level with `count` moving hazards should use an EntityBatch."""
+    return np is not None and count >= BATCH_MIN_ENTITIES
+
+
+class EntityBatch:
+    """
+    Steps many simple enemies at once, stored as a struct of NumPy arrays
+    (positions, directions, timers, patrol waypoints) instead of one Python
+    object each. Two kinds are supported, matching the object versions:
+    bouncers (Level3's Hazard) and patrollers (Enemy).
+    Every tick is a handful of vectorized operations, whatever the entity count,
+    and the player check is a single array comparison.
+    """
+
+    BOUNCER, PATROLLER = 0, 1
+
+    def __init__(self, walls):
+        # A view onto the wall grid's bytes, so wall changes are seen without copying
+        self.walls = np.frombuffer(walls.cells, dtype=np.uint8).reshape(walls.h, walls.w)
+        self.wall_mask = walls.mask
+        self._pending = []
+        self.count = 0
+
+    # --- Building the batch ---
+    def add_hazard(self, hazard):
+        """Adds a bouncing Hazard, starting from its current position, direction and head start."""
+        self._pending.append((self.BOUNCER, hazard.x, hazard.y, hazard.dx, hazard.dy,
+                              hazard.first_move, hazard.move_interval, 0, [(hazard.x, hazard.y)], 0))
+
+    def add_enemy(self, enemy):
+        """Adds a patrolling Enemy, starting from its current position and waypoint."""
+        self._pending.append((self.PATROLLER, enemy.x, enemy.y, 0, 0,
+                              enemy.move_interval, enemy.move_interval, enemy.wait_cycles,
+                              list(enemy.path), enemy.path_index))
+
+    def _pack(self):
+        """Turns the entities added so far into arrays."""
+        rows = self._pending
+        self._pending = []
+        self.count = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * 10
+        kind, x, y, dx, dy, timer, interval, wait, paths, index = columns
+
+        self.kind = np.array(kind, dtype=np.int8)
+        self.x = np.array(x, dtype=np.int32)
+        self.y = np.array(y, dtype=np.int32)
+        self.dx = np.array(dx, dtype=np.int32)
+        self.dy = np.array(dy, dtype=np.int32)
+        self.timer = np.array(timer, dtype=np.int32)
+        self.interval = np.array(interval, dtype=np.int32)
+        self.wait = np.array(wait, dtype=np.int32)
+        self.path_index = np.array(index, dtype=np.int32)
+        self.path_len = np.array([len(p) for p in paths], dtype=np.int32)
+        # Waypoints padded to the longest path: shape (count, longest, 2)
+        longest = max(self.path_len, default=1)
+        self.waypoints = np.zeros((self.count, longest, 2), dtype=np.int32)
+        for i, path in enumerate(paths):
+            self.waypoints[i, :len(path)] = path
+
+    def _blocked(self, x, y):
+        h, w = self.walls.shape
+        inside = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+        flags = self.walls[np.clip(y, 0, h - 1), np.clip(x, 0, w - 1)]
+        return inside & (flags & self.wall_mask != 0)
+
+    # --- Simulation ---
+    def step(self, player_x, player_y):
+        """
+        Advances every entity by one tick. Returns True if an entity that
+        moved this tick landed on the player.
+        """
+        if self._pending:
+            self._pack()
+        if self.count == 0:
+            return False
+
+        self.timer -= 1
+        due = self.timer <= 0
+        if not due.any():
+            return False
+        delay = self.interval.copy()
+
+        # Bouncers: flip the blocked axis, then move (like Hazard.update)
+        b = due & (self.kind == self.BOUNCER)
+        if b.any():
+            x, y, dx, dy = self.x[b], self.y[b], self.dx[b], self.dy[b]
+            hit = self._blocked(x + dx, y + dy)
+            dx = np.where(hit & self._blocked(x + dx, y), -dx, dx)
+            dy = np.where(hit & self._blocked(x, y + dy), -dy, dy)
+            self.dx[b], self.dy[b] = dx, dy
+            self.x[b], self.y[b] = x + dx, y + dy
+
+        # Patrollers: pick the next waypoint when one is reached, then step toward it (like Enemy.update)
+        p = due & (self.kind == self.PATROLLER)
+        if p.any():
+            rows = np.nonzero(p)[0]
+            x, y, index = self.x[rows], self.y[rows], self.path_index[rows]
+            target = self.waypoints[rows, index]
+            arrived = (x == target[:, 0]) & (y == target[:, 1])
+            index = np.where(arrived, (index + 1) % self.path_len[rows], index)
+            target = self.waypoints[rows, index]
+            self.path_index[rows] = index
+            self.x[rows] = x + np.sign(target[:, 0] - x)
+            self.y[rows] = y + np.sign(target[:, 1] - y)
+            delay[rows] = np.where(arrived, self.interval[rows] * (1 + self.wait[rows]), self.interval[rows])
+
+        self.timer[due] = delay[due]
+        return bool((due & (self.x == player_x) & (self.y == player_y)).any())
+
+    # --- Drawing ---
+    def positions(self):
+        """Returns the set of tiles currently occupied by entities."""
+        if self._pending:
+            self._pack()
+        return set(zip(self.x.tolist(), self.y.tolist()))
+
+    def draw(self, surf, camx, camy, color=RED):
+        """Draws the entities inside the camera view as filled tiles."""
+        if self._pending:
+            self._pack()
+        visible = (self.x >= camx) & (self.x < camx + VIEW_W) & (self.y >= camy) & (self.y < camy + VIEW_H)
+        for x, y in zip(self.x[visible].tolist(), self.y[visible].tolist()):
+            surf.fill(color, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
@@ -0,0 +1,32 @@
+# fonts.py
+import functools
+import pygame
+
+# How many rendered text surfaces to keep around
+TEXT_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(name, size):
+    """
+    Returns a shared Font for (name, size), creating it the first time it is asked for.
+    Building a SysFont is slow, so it should never happen inside a draw call.
+    """
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont(name, size)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font, text, color, antialias=True):
+    """
+    Renders text with the given font and keeps the surface in an LRU cache,
+    so drawing the same label every frame costs a single blit.
+    The returned surface is shared and must not be drawn on.
+    """
+    return font.render(text, antialias, color)
+
+
+def clear_text_cache():
+    """Drops every cached text surface (fonts stay loaded)."""
+    render_text.cache_clear()
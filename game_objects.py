@@ -1,8 +1,12 @@
 # game_objects.py
 import pygame
+import controls
 import random
 import math
 from settings import *
+from fonts import get_font, render_text
+from scheduler import TimerWheel
+from pathfinding import DIRECTIONS
 
 
 # --- PLAYER CLASS (UPDATED) ---
@@ -14,17 +18,14 @@ class Player:
 
         # --- New additions for continuous movement ---
         self.move_cooldown = 8  # How many frames to wait between moves. Lower is faster.
-        self.move_timer = 0  # The current countdown timer.
+        self.next_move_tick = 0  # The first tick on which the player may move again.
 
-    def update(self, obstacles):
-        # First, count down the timer
-        if self.move_timer > 0:
-            self.move_timer -= 1
-
-        # Only check for input if the cooldown timer is ready
-        if self.move_timer == 0:
+    def update(self, obstacles, now):
+        """Moves the player with the arrow keys. `now` is the level's current tick."""
+        # Only check for input once the cooldown has run out
+        if now >= self.next_move_tick:
             # Get a dictionary of all keys currently being held down
-            keys = pygame.key.get_pressed()
+            keys = controls.get_pressed()
 
             # Check which arrow key is pressed and move accordingly
             moved = False
@@ -41,17 +42,17 @@ class Player:
                 self.move(0, 1, obstacles)
                 moved = True
 
-            # If the player moved, reset the cooldown timer
+            # If the player moved, start the cooldown
             if moved:
-                self.move_timer = self.move_cooldown
+                self.next_move_tick = now + self.move_cooldown
 
     def move(self, dx, dy, obstacles):
         """
         This method is now called by the new update method.
-        It moves the player if the destination is not in the obstacles set.
+        It moves the player if the destination is not blocked in the obstacle grid.
         """
         next_x, next_y = self.x + dx, self.y + dy
-        if (next_x, next_y) not in obstacles:
+        if not obstacles.is_blocked(next_x, next_y):
             self.x, self.y = next_x, next_y
 
     def draw(self, surf, cam_x, cam_y):
@@ -117,11 +118,92 @@ class Mirror:
     def draw(self, surf, camx, camy):
         rect = ((self.x - camx) * TILE, (self.y - camy) * TILE, TILE, TILE)
         pygame.draw.rect(surf, DARK_GRAY, rect, 2)
-        font = pygame.font.SysFont(None, 24)
-        text = font.render(self.orientation, True, WHITE)
+        text = render_text(get_font(None, 24), self.orientation, WHITE)
         surf.blit(text, (rect[0] + 8, rect[1] + 4))
 
 
+class BeamTracer:
+    """
+    Traces a light beam through a fixed set of mirrors. Mirrors are looked up
+    by tile, and each traced path is remembered for its source and mirror
+    orientations, so flipping a mirror back and forth never traces twice.
+    The beam stops when it reaches `target`, or when it leaves the area
+    0 < x < bounds[0], 0 < y < bounds[1] anywhere except on a mirror.
+    """
+
+    def __init__(self, mirrors, target, bounds, max_steps):
+        self.mirror_at = {(m.x, m.y): m for m in mirrors}
+        self.target = target
+        self.bounds = bounds
+        self.max_steps = max_steps
+        self.source = None
+        self.path = []
+        self.reached = False
+        self._hits = {}  # Mirror tile -> index in path where the beam first reaches it
+        self._cache = {}
+
+    def _key(self, source):
+        return source, tuple(m.orientation for m in self.mirror_at.values())
+
+    def _walk(self, path, hits, x, y, dx, dy):
+        """Extends path (and hits) from (x, y) heading (dx, dy). Returns True if the target was reached."""
+        xmax, ymax = self.bounds
+        for _ in range(self.max_steps - len(path)):
+            x += dx
+            y += dy
+            path.append((x, y))
+
+            if (x, y) == self.target:
+                return True
+
+            m = self.mirror_at.get((x, y))
+            if m is not None:
+                hits.setdefault((x, y), len(path) - 1)
+                dx, dy = (-dy, -dx) if m.orientation == "/" else (dy, dx)
+            elif not (0 < x < xmax and 0 < y < ymax):
+                break
+        return False
+
+    def _use(self, key, result):
+        self._cache[key] = result
+        self.source = key[0]
+        self.path, self._hits, self.reached = result
+        return self.path, self.reached
+
+    def trace(self, source):
+        """Returns (path, reached) for a beam leaving source = (x, y, dx, dy)."""
+        key = self._key(source)
+        if key in self._cache:
+            return self._use(key, self._cache[key])
+
+        path, hits = [], {}
+        x, y, dx, dy = source
+        reached = self._walk(path, hits, x, y, dx, dy)
+        return self._use(key, (path, hits, reached))
+
+    def retrace_after(self, mirror):
+        """
+        Returns (path, reached) after `mirror` was rotated. The path up to the
+        mirror is unchanged, so only the part after it is traced again.
+        """
+        key = self._key(self.source)
+        if key in self._cache:
+            return self._use(key, self._cache[key])
+
+        i = self._hits.get((mirror.x, mirror.y))
+        if i is None:  # The beam never reaches this mirror
+            return self._use(key, (self.path, self._hits, self.reached))
+
+        path = self.path[:i + 1]
+        hits = {tile: j for tile, j in self._hits.items() if j <= i}
+        x, y = path[i]
+        px, py = path[i - 1] if i > 0 else self.source[:2]
+        dx, dy = x - px, y - py
+        dx, dy = (-dy, -dx) if mirror.orientation == "/" else (dy, dx)
+        reached = self._walk(path, hits, x, y, dx, dy)
+        return self._use(key, (path, hits, reached))
+
+
 class Enemy:
     """An enemy that patrols a set path."""
 
@@ -129,25 +211,25 @@ class Enemy:
         self.x, self.y = x, y
         self.path = path  # A list of (x,y) coordinates to follow
         self.path_index = 0
-        self.wait_timer = 0
-        self.speed_timer = 0
+        self.move_interval = 5  # This slows the enemy down, moving 1 tile per 5 frames
+        self.wait_cycles = 5  # Move cycles to wait at each waypoint
 
-    def update(self, player):
-        """Updates the enemy's position and checks for player collision."""
-        self.speed_timer += 1
-        if self.speed_timer < 5:  # This slows the enemy down, moving 1 tile per 5 frames
-            return None
-        self.speed_timer = 0
+    def start(self, scheduler, player):
+        """Registers the enemy's first move with the level's scheduler."""
+        scheduler.call_later(self.move_interval, self.update, scheduler, player)
 
-        if self.wait_timer > 0:
-            self.wait_timer -= 1
-            return None
+    def update(self, scheduler, player):
+        """
+        Moves the enemy one tile, schedules its next move and checks for player collision.
+        Called by the scheduler, so the enemy costs nothing on frames where it doesn't move.
+        """
+        delay = self.move_interval
 
         target = self.path[self.path_index]
         if (self.x, self.y) == target:
             self.path_index = (self.path_index + 1) % len(self.path)
             target = self.path[self.path_index]
-            self.wait_timer = 5  # Wait for 5 update cycles at the waypoint
+            delay *= 1 + self.wait_cycles  # Wait at the waypoint before the next move
 
         dx = target[0] - self.x
         dy = target[1] - self.y
@@ -155,6 +237,8 @@ class Enemy:
         if dx != 0: self.x += dx // abs(dx)
         if dy != 0: self.y += dy // abs(dy)
 
+        scheduler.call_later(delay, self.update, scheduler, player)
+
         # If the player is caught, signal the level to reset
         if (self.x, self.y) == (player.x, player.y):
             return "reset"
@@ -190,21 +274,45 @@ class PressurePlate:
         pygame.draw.rect(surf, color, rect)
 
 class Bridge:
-    """A bridge tile that appears and disappears on a timer."""
+    """
+    A bridge tile that appears and disappears on a timer.
+    Its state is a pure function of the tick: it repeats every
+    solid + vanish frames, shifted by the offset, so it never needs a countdown.
+    """
     def __init__(self, x, y, solid_time, vanish_time, offset=0):
         self.x, self.y = x, y
         self.solid_duration = solid_time  # How long it stays solid (in frames)
         self.vanish_duration = vanish_time # How long it stays vanished (in frames)
-        self.timer = offset
+        self.offset = offset
+        self.period = solid_time + vanish_time
+        # Tick at which a solid phase starts. With no offset the bridge is solid
+        # on tick 0 only and starts its first vanish phase on tick 1.
+        self.phase = offset if offset > 0 else 1 - solid_time
+        self.tick = 0
         self.is_solid = offset <= 0 # If offset is 0, start solid
 
+    def is_solid_at(self, tick):
+        """Returns whether the bridge is solid after `tick` updates."""
+        if tick < self.offset:
+            return False  # Still waiting out the offset
+        return (tick - self.phase) % self.period < self.solid_duration
+
+    def next_toggle(self, tick):
+        """Returns the first tick after `tick` on which the bridge changes state."""
+        if tick < self.offset:
+            return self.offset
+        p = (tick - self.phase) % self.period
+        if p < self.solid_duration:
+            return tick + self.solid_duration - p
+        return tick + self.period - p
+
     def update(self):
-        """Updates the bridge's timer and toggles its state."""
-        self.timer -= 1
-        if self.timer <= 0:
-            self.is_solid = not self.is_solid
-            # Reset timer to the appropriate duration for the new state
-            self.timer = self.solid_duration if self.is_solid else self.vanish_duration
+        """Advances this bridge on its own by one tick. Returns True if it toggled."""
+        self.tick += 1
+        solid = self.is_solid_at(self.tick)
+        toggled = solid != self.is_solid
+        self.is_solid = solid
+        return toggled
 
     def draw(self, surf, cam_x, cam_y):
         rect = ((self.x - cam_x) * TILE, (self.y - cam_y) * TILE, TILE, TILE)
@@ -216,6 +324,95 @@ class Bridge:
             pygame.draw.rect(surf, (50, 70, 90), rect, 2) # The '2' means draw a 2px outline
 
 
+class BridgeClock:
+    """
+    Drives many bridges from a single tick counter.
+    Each bridge has one timer on the wheel for its next toggle, so a tick where
+    nothing flips costs nothing, however many bridges the level has.
+    on_toggle(bridge) is called for every bridge right after it flips.
+    """
+
+    def __init__(self, bridges, on_toggle=None, wheel=None):
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self.on_toggle = on_toggle
+        for bridge in bridges:
+            self.wheel.call_at(bridge.next_toggle(self.wheel.now), self._toggle, bridge)
+
+    def _toggle(self, bridge):
+        now = self.wheel.now
+        bridge.tick = now
+        bridge.is_solid = bridge.is_solid_at(now)
+        self.wheel.call_at(bridge.next_toggle(now), self._toggle, bridge)
+        if self.on_toggle:
+            self.on_toggle(bridge)
+
+    def advance(self):
+        """Moves all bridges forward by one tick."""
+        self.wheel.advance()
+
+
+class SpokeTable:
+    """
+    Precomputed spoke tiles for every gear with the same radius and spoke layout.
+    For each discrete angle step it stores the hazard tiles relative to the axle,
+    so finding a gear's hazards is a table lookup plus a translation.
+    """
+
+    ANGLE_STEPS = 720  # Half-degree steps, fine enough for every gear speed in the game
+    _tables = {}
+
+    @classmethod
+    def get(cls, radius, spoke_angles):
+        """Returns the shared table for this radius and spoke layout."""
+        key = (radius, tuple(spoke_angles))
+        if key not in cls._tables:
+            cls._tables[key] = cls(radius, spoke_angles)
+        return cls._tables[key]
+
+    def __init__(self, radius, spoke_angles):
+        self.radius = radius
+        self.offsets = [self._compute(step * 360 / self.ANGLE_STEPS, radius, spoke_angles)
+                        for step in range(self.ANGLE_STEPS)]
+        self._swept = {}
+
+    @staticmethod
+    def _compute(angle, radius, spoke_angles):
+        offsets = set()
+        for angle_offset in spoke_angles:
+            angle_rad = math.radians((angle + angle_offset) % 360)
+            dx, dy = math.cos(angle_rad), math.sin(angle_rad)
+
+            # Get all tiles along the spoke from center to radius
+            for r in range(1, radius + 1):
+                offsets.add((round(dx * r), round(dy * r)))
+
+        offsets.discard((0, 0))  # The axle is handled separately
+        return frozenset(offsets)
+
+    def __deepcopy__(self, memo):
+        # Tables are shared between gears and never change, so copies keep using this one
+        return self
+
+    def step_of(self, angle):
+        """Converts an angle in degrees to the nearest table step."""
+        return round(angle * self.ANGLE_STEPS / 360) % self.ANGLE_STEPS
+
+    def swept(self, start_step, end_step, direction):
+        """
+        Returns every offset the spokes pass over while turning from start_step
+        to end_step (both included) in the given direction (+1 or -1).
+        """
+        key = (start_step, end_step, direction)
+        if key not in self._swept:
+            offsets = set(self.offsets[start_step])
+            step = start_step
+            while step != end_step:
+                step = (step + direction) % self.ANGLE_STEPS
+                offsets |= self.offsets[step]
+            self._swept[key] = frozenset(offsets)
+        return self._swept[key]
+
+
 class Gear:
     """
     A rotating gear that acts as a spinning hazard.
@@ -227,11 +424,18 @@ class Gear:
         self.radius = radius
         self.speed = speed
         self.current_angle = 0.0
+        self.previous_angle = 0.0
         self.is_rotating = True
         self.spoke_angles = [0, 90, 180, 270]  # 4 spokes
+        self.spoke_table = SpokeTable.get(radius, self.spoke_angles)
+
+        # Hazard tiles for the last angle step they were asked for
+        self._tiles_step = None
+        self._tiles = frozenset()
 
     def update(self):
         """Updates the gear's rotation."""
+        self.previous_angle = self.current_angle
         if self.is_rotating:
             self.current_angle = (self.current_angle + self.speed) % 360
 
@@ -240,22 +444,32 @@ class Gear:
         return (self.x, self.y)
 
     def get_hazard_tiles(self):
-        """Returns a set of all tiles covered by the spinning spokes."""
-        tiles = set()
-
-        for angle_offset in self.spoke_angles:
-            angle_deg = (self.current_angle + angle_offset) % 360
-            angle_rad = math.radians(angle_deg)
-            dx, dy = math.cos(angle_rad), math.sin(angle_rad)
-
-            # Get all tiles along the spoke from center to radius
-            for r in range(1, self.radius + 1):
-                tx = round(self.x + dx * r)
-                ty = round(self.y + dy * r)
-                tiles.add((tx, ty))
+        """Returns the set of all tiles covered by the spinning spokes. The set must not be modified."""
+        step = self.spoke_table.step_of(self.current_angle)
+        if step != self._tiles_step:
+            x, y = self.x, self.y
+            self._tiles = frozenset((x + dx, y + dy) for dx, dy in self.spoke_table.offsets[step])
+            self._tiles_step = step
+        return self._tiles
+
+    def _swept_offsets(self):
+        table = self.spoke_table
+        direction = 1 if self.speed >= 0 else -1
+        return table.swept(table.step_of(self.previous_angle), table.step_of(self.current_angle), direction)
+
+    def get_swept_tiles(self):
+        """
+        Returns every tile the spokes passed over during the last update,
+        so a fast gear cannot skip over a tile between two frames.
+        """
+        x, y = self.x, self.y
+        return {(x + dx, y + dy) for dx, dy in self._swept_offsets()}
 
-        tiles.discard((self.x, self.y))  # The axle is handled separately
-        return tiles
+    def hits(self, x, y):
+        """Returns True if a tile is the axle or was swept by a spoke during the last update."""
+        if (x, y) == (self.x, self.y):
+            return True
+        return (x - self.x, y - self.y) in self._swept_offsets()
 
     def draw(self, surf, camx, camy):
         # 1. Draw hazard spokes
@@ -275,18 +489,22 @@ class ChaserEnemy:
 
     def __init__(self, x, y):
         self.x, self.y = x, y
-        self.speed_timer = 0
         self.move_cooldown = 12  # Moves slightly slower than the player
 
-    def update(self, player, obstacles):
+    def start(self, scheduler, player, obstacles, flow_field=None):
+        """
+        Registers the chaser's first move with the level's scheduler.
+        With a FlowField (shared by every chaser of the level) the chaser
+        follows the shortest path around walls instead of heading straight at the player.
+        """
+        scheduler.call_later(self.move_cooldown, self.update, scheduler, player, obstacles, flow_field)
+
+    def update(self, scheduler, player, obstacles, flow_field=None):
         """
         Updates the chaser's position using a simple pathfinding.
-        Moves toward the player, checking obstacles.
+        Moves toward the player, checking obstacles, then schedules the next move.
         """
-        self.speed_timer += 1
-        if self.speed_timer < self.move_cooldown:
-            return None
-        self.speed_timer = 0
+        scheduler.call_later(self.move_cooldown, self.update, scheduler, player, obstacles, flow_field)
 
         if (self.x, self.y) == (player.x, player.y):
             return "reset"  # Player is caught
@@ -294,31 +512,47 @@ class ChaserEnemy:
         dx = player.x - self.x
         dy = player.y - self.y
 
+        step = None
+        if flow_field is not None:
+            # Among equally short paths, prefer the axis the direct chase would take
+            sx, sy = (dx > 0) - (dx < 0), (dy > 0) - (dy < 0)
+            horizontal, vertical = (sx or 1, 0), (0, sy or 1)
+            preferred = (horizontal, vertical) if abs(dx) > abs(dy) else (vertical, horizontal)
+            step = flow_field.next_step(self.x, self.y, (player.x, player.y), preferred + DIRECTIONS)
+
+        if step is not None:
+            self.x += step[0]
+            self.y += step[1]
+        else:
+            # No path (or no flow field): head straight for the player
+            self._chase_directly(dx, dy, obstacles)
+
+        if (self.x, self.y) == (player.x, player.y):
+            return "reset"  # Player is caught
+
+    def _chase_directly(self, dx, dy, obstacles):
         # Try to move in the direction of the largest distance
         if abs(dx) > abs(dy):
             # Try to move horizontally
             move_x = dx // abs(dx) if dx != 0 else 0
-            if (self.x + move_x, self.y) not in obstacles:
+            if not obstacles.is_blocked(self.x + move_x, self.y):
                 self.x += move_x
             # If blocked, try to move vertically
             elif dy != 0:
                 move_y = dy // abs(dy)
-                if (self.x, self.y + move_y) not in obstacles:
+                if not obstacles.is_blocked(self.x, self.y + move_y):
                     self.y += move_y
         else:
             # Try to move vertically
             move_y = dy // abs(dy) if dy != 0 else 0
-            if (self.x, self.y + move_y) not in obstacles:
+            if not obstacles.is_blocked(self.x, self.y + move_y):
                 self.y += move_y
             # If blocked, try to move horizontally
             elif dx != 0:
                 move_x = dx // abs(dx)
-                if (self.x + move_x, self.y) not in obstacles:
+                if not obstacles.is_blocked(self.x + move_x, self.y):
                     self.x += move_x
 
-        if (self.x, self.y) == (player.x, player.y):
-            return "reset"  # Player is caught
-
     def draw(self, surf, camx, camy):
         rect = ((self.x - camx) * TILE, (self.y - camy) * TILE, TILE, TILE)
         # Draw a scarier-looking enemy
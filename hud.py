@@ -0,0 +1,37 @@
+# hud.py
+import pygame
+from fonts import render_text
+
+# Characters needed to draw an MM:SS:MS timer
+TIMER_CHARS = "0123456789:"
+
+
+class GlyphAtlas:
+    """
+    Pre-renders a small set of characters once so that text made only of
+    those characters (like the timer) can be drawn as a row of blits,
+    without rasterizing anything per frame.
+    """
+
+    def __init__(self, font, color, chars=TIMER_CHARS):
+        self.glyphs = {c: render_text(font, c, color) for c in chars}
+        self.height = max(g.get_height() for g in self.glyphs.values())
+
+    def width(self, text):
+        return sum(self.glyphs[c].get_width() for c in text)
+
+    def draw(self, surface, text, pos):
+        """Blits the text glyph by glyph starting at pos. Returns the covered rect."""
+        x, y = pos
+        glyphs = self.glyphs
+        for c in text:
+            glyph = glyphs[c]
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+
+def draw_centered(surface, font, text, color, center):
+    """Draws a static line of text (banner, menu entry) centered on a point, using the text cache."""
+    text_surf = render_text(font, text, color)
+    return surface.blit(text_surf, text_surf.get_rect(center=center))
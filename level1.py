@@ -1,46 +1,31 @@
 # levels/level1.py
 import pygame
-import random
 from settings import *
 from levels.level_base import Level
 from game_objects import Player, Key, Door
+from maze import generate_maze, sample_open_tiles
 
 
 class Level1(Level):
-    def __init__(self):
-        super().__init__()
-        self.grid_w, self.grid_h = 41, 31
-        self.walls = self._generate_maze(self.grid_w, self.grid_h)
+    # Maze settings. With no seed every game gets a new maze.
+    maze_size = (41, 31)
+    maze_algorithm = "backtracker"
+    maze_seed = None
+
+    def __init__(self, seed=None):
+        super().__init__(seed if seed is not None else self.maze_seed)
+        self.grid_w, self.grid_h = self.maze_size
+        self.walls = generate_maze(self.grid_w, self.grid_h, self.seed, self.maze_algorithm)
         self.player = Player(1, 1)
-        open_spaces = [(x, y) for x in range(1, self.grid_w - 1)
-                       for y in range(1, self.grid_h - 1) if (x, y) not in self.walls]
-        random.shuffle(open_spaces)
-        self.keys = [Key(*pos) for pos in open_spaces[:3]]
         self.door = Door(self.grid_w - 2, self.grid_h - 2)
 
-    # _generate_maze method remains the same...
-    def _generate_maze(self, w, h):
-        walls = {(x, y) for x in range(w) for y in range(h)}
-        start = (1, 1)
-        stack, carved = [start], {start}
-        walls.remove(start)
-        dirs = [(2, 0), (-2, 0), (0, 2), (0, -2)]
-        while stack:
-            x, y = stack[-1]
-            random.shuffle(dirs)
-            moved = False
-            for dx, dy in dirs:
-                nx, ny = x + dx, y + dy
-                if 1 <= nx < w - 1 and 1 <= ny < h - 1 and (nx, ny) not in carved:
-                    walls.discard((x + dx // 2, y + dy // 2))
-                    walls.discard((nx, ny))
-                    carved.add((nx, ny))
-                    stack.append((nx, ny))
-                    moved = True
-                    break
-            if not moved:
-                stack.pop()
-        return walls
+        # Every open tile of the maze is reachable, so keys go on random open tiles
+        key_tiles = sample_open_tiles(self.walls, 3, self.rng,
+                                      exclude={(self.player.x, self.player.y), (self.door.x, self.door.y)})
+        self.keys = [Key(*pos) for pos in key_tiles]
+        for k in self.keys:
+            self.entities.add(k)
+        self.keys_left = len(self.keys)
 
     def get_obstacles(self):
         """Level 1 only has walls as obstacles."""
@@ -58,17 +43,20 @@ class Level1(Level):
     def update(self):
         """Updates the logic for the level."""
         # --- NEW ---
+        self.scheduler.tick()
+
         # Call the player's own update method for movement
-        self.player.update(self.get_obstacles())
+        self.player.update(self.get_obstacles(), self.scheduler.now)
 
         # Check for key collection
-        for k in self.keys:
-            if not k.collected and (self.player.x, self.player.y) == (k.x, k.y):
+        for k in self.entities.at(self.player.x, self.player.y, Key):
+            if not k.collected:
                 k.collected = True
+                self.keys_left -= 1
                 print("Collected a key!")
 
         # Unlock the door if all keys are collected
-        if all(k.collected for k in self.keys):
+        if self.keys_left == 0:
             self.door.locked = False
 
         # Check for the win condition
@@ -76,14 +64,20 @@ class Level1(Level):
             print("Level 1 Complete!")
             self.is_complete = True
 
+    def get_state(self):
+        return super().get_state() + (self.keys_left, self.door.locked)
+
     # draw method remains the same...
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        tiles.update((k.x, k.y) for k in self.keys)
+        return tiles
+
     def draw(self, surface):
-        cam_x = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        cam_y = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        cam_x, cam_y = self.get_camera()
         surface.fill(BLACK)
-        for (x, y) in self.walls:
-            if cam_x <= x < cam_x + VIEW_W and cam_y <= y < cam_y + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - cam_x) * TILE, (y - cam_y) * TILE, TILE, TILE))
+        self.draw_walls(surface, cam_x, cam_y)
         for k in self.keys: k.draw(surface, cam_x, cam_y)
         self.door.draw(surface, cam_x, cam_y)
         self.player.draw(surface, cam_x, cam_y)
@@ -1,8 +1,7 @@
 # levels/level2.py
 import pygame
-import time
 from settings import *
-from levels.level_base import Level
+from levels.level_base import Level, OccupancyGrid, ObstacleMap, WALL, GATE
 from game_objects import Player, Switch, Door
 
 
@@ -13,10 +12,12 @@ class Level2(Level):
     timed gates and reach the exit.
     """
 
-    def __init__(self):
-        super().__init__()
+    wall_color = DARK_GRAY
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
         self.grid_w, self.grid_h = 61, 20
-        self.walls = set()
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h, fill=WALL)
         self._carve_layout()
 
         self.gates = {
@@ -28,6 +29,8 @@ class Level2(Level):
             Switch(16, 7, BLUE, 0, "B"), Switch(20, 11, YELLOW, 1, "B"),
             Switch(28, 7, RED, 0, "C"), Switch(32, 11, GREEN, 1, "C"),
         ]
+        for s in self.switches:
+            self.entities.add(s)
 
         self.door = Door(48, 9)
         self.walls.discard((self.door.x, self.door.y))
@@ -36,13 +39,14 @@ class Level2(Level):
         self.sequences = {"A": [0, 1], "B": [0, 1], "C": [0, 1]}
         self.current_orders = {"A": [], "B": [], "C": []}
         self.gates_open = {"A": False, "B": False, "C": False}
-        self.timers = {"A": 0, "B": 0, "C": 0}
+        self.gate_open_time = FPS * 15  # Gates close again after 15 seconds
 
-    def _carve_layout(self):
-        for x in range(self.grid_w):
-            for y in range(self.grid_h):
-                self.walls.add((x, y))
+        # Closed gates live on the GATE layer and are only touched when a gate opens or closes
+        self.obstacles = ObstacleMap(self.walls)
+        for gid in self.gates:
+            self._set_gate(gid, False)
 
+    def _carve_layout(self):
         def carve_rect(x1, y1, x2, y2):
             for x in range(x1, x2 + 1):
                 for y in range(y1, y2 + 1):
@@ -58,8 +62,17 @@ class Level2(Level):
 
     def get_obstacles(self):
         """Returns all impassable tiles, including walls and closed gates."""
-        closed_gates = set().union(*[g for gid, g in self.gates.items() if not self.gates_open[gid]])
-        return self.walls.union(closed_gates)
+        return self.obstacles.grid
+
+    def _set_gate(self, gid, is_open):
+        """Opens or closes a gate and updates the obstacle map to match."""
+        self.gates_open[gid] = is_open
+        self.obstacles.set_layer(gid, () if is_open else self.gates[gid], GATE)
+
+    def _close_gate(self, gid):
+        """Scheduled when a gate opens; closes it again."""
+        print(f"Gate {gid} closed!")
+        self._set_gate(gid, False)
 
     def handle_event(self, event):
         """
@@ -70,12 +83,14 @@ class Level2(Level):
 
     def update(self):
         """Updates all puzzle logic and player movement for the level."""
+        self.scheduler.tick()
+
         # --- NEW: Handle player's continuous movement ---
-        self.player.update(self.get_obstacles())
+        self.player.update(self.get_obstacles(), self.scheduler.now)
 
         # --- Switch activation logic ---
-        for s in self.switches:
-            if (self.player.x, self.player.y) == (s.x, s.y) and not s.activated:
+        for s in self.entities.at(self.player.x, self.player.y, Switch):
+            if not s.activated:
                 s.activated = True
                 group_id = s.group_id
                 self.current_orders[group_id].append(s.order_index)
@@ -85,8 +100,8 @@ class Level2(Level):
 
                 if current_seq == target_seq:
                     print(f"Gate {group_id} opened!")
-                    self.gates_open[group_id] = True
-                    self.timers[group_id] = time.time()
+                    self._set_gate(group_id, True)
+                    self.scheduler.call_later(self.gate_open_time, self._close_gate, group_id)
                 elif not target_seq[:len(current_seq)] == current_seq:
                     print(f"Wrong order for Gate {group_id}, puzzle reset.")
                     self.current_orders[group_id] = []
@@ -95,10 +110,7 @@ class Level2(Level):
                             sw.activated = False
 
         # --- Timed gates logic ---
-        for gid in self.gates_open:
-            if self.gates_open[gid] and time.time() - self.timers[gid] > 15:
-                print(f"Gate {gid} closed!")
-                self.gates_open[gid] = False
+        self.scheduler.run_due()
 
         # --- Final door logic ---
         if self.gates_open["C"]:
@@ -109,15 +121,23 @@ class Level2(Level):
             print("Level 2 Complete!")
             self.is_complete = True
 
+    def get_state(self):
+        return super().get_state() + (self.gates_open, self.current_orders)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        tiles.update((s.x, s.y) for s in self.switches)
+        for gset in self.gates.values():
+            tiles.update(gset)
+        return tiles
+
     def draw(self, surface):
         """Draws all level elements."""
-        cam_x = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        cam_y = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        cam_x, cam_y = self.get_camera()
 
         surface.fill(BLACK)
-        for (x, y) in self.walls:
-            if cam_x <= x < cam_x + VIEW_W and cam_y <= y < cam_y + VIEW_H:
-                pygame.draw.rect(surface, DARK_GRAY, ((x - cam_x) * TILE, (y - cam_y) * TILE, TILE, TILE))
+        self.draw_walls(surface, cam_x, cam_y)
 
         for gid, gset in self.gates.items():
             if not self.gates_open[gid]:
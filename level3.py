@@ -2,8 +2,9 @@
 import pygame
 import random
 from settings import *
-from levels.level_base import Level
-from game_objects import Player, Door, Mirror
+from levels.level_base import Level, OccupancyGrid, WALL
+from game_objects import Player, Door, Mirror, BeamTracer
+from entity_engine import EntityBatch, should_batch
 
 
 # --- Helper classes specific to this level ---
@@ -15,33 +16,19 @@ class LightBeam:
         self.source = source
         self.mirrors = mirrors
         self.door = door
+        self.tracer = BeamTracer(mirrors, (door.x, door.y), (door.x + 5, door.y + 30), GRID_W * GRID_H)
         self.path = []
         self.update()
 
     def update(self):
         """Recalculates the beam's path based on mirror orientations."""
-        self.door.locked = True
-        self.path = []
-        x, y, dx, dy = self.source
-
-        for _ in range(GRID_W * GRID_H):
-            x += dx
-            y += dy
-            self.path.append((x, y))
-
-            if (x, y) == (self.door.x, self.door.y):
-                self.door.locked = False
-                break
+        self.path, reached = self.tracer.trace(self.source)
+        self.door.locked = not reached
 
-            mirror_hit = False
-            for m in self.mirrors:
-                if (x, y) == (m.x, m.y):
-                    dx, dy = (-dy, -dx) if m.orientation == "/" else (dy, dx)
-                    mirror_hit = True
-                    break
-
-            if not mirror_hit and not (0 < x < self.door.x + 5 and 0 < y < self.door.y + 30):
-                break
+    def mirror_rotated(self, mirror):
+        """Updates the beam after `mirror` was rotated, retracing only the part past it."""
+        self.path, reached = self.tracer.retrace_after(mirror)
+        self.door.locked = not reached
 
     def draw(self, surf, camx, camy):
         for (x, y) in self.path:
@@ -54,20 +41,24 @@ class LightBeam:
 class Hazard:
     """A moving hazard that resets the level on contact with the player."""
 
-    def __init__(self, x, y, dx, dy):
+    def __init__(self, x, y, dx, dy, rng=random):
         self.x, self.y, self.dx, self.dy = x, y, dx, dy
-        self.speed_timer = random.randint(0, 10)
+        self.move_interval = 10  # Frames between moves
+        # Random head start so the hazards don't all move on the same frame
+        self.first_move = max(1, self.move_interval - rng.randint(0, 10))
+
+    def start(self, scheduler, player, walls):
+        """Registers the hazard's first move with the level's scheduler."""
+        scheduler.call_later(self.first_move, self.update, scheduler, player, walls)
 
-    def update(self, player, walls):
-        self.speed_timer += 1
-        if self.speed_timer < 10:
-            return None
-        self.speed_timer = 0
+    def update(self, scheduler, player, walls):
+        """Moves the hazard one tile, bouncing off walls, and schedules its next move."""
+        scheduler.call_later(self.move_interval, self.update, scheduler, player, walls)
 
         nx, ny = self.x + self.dx, self.y + self.dy
-        if (nx, ny) in walls:
-            if (self.x + self.dx, self.y) in walls: self.dx *= -1
-            if (self.x, self.y + self.dy) in walls: self.dy *= -1
+        if walls.is_blocked(nx, ny):
+            if walls.is_blocked(self.x + self.dx, self.y): self.dx *= -1
+            if walls.is_blocked(self.x, self.y + self.dy): self.dy *= -1
             nx, ny = self.x + self.dx, self.y + self.dy
 
         self.x, self.y = nx, ny
@@ -82,14 +73,13 @@ class Hazard:
 # --- Main Level Class ---
 
 class Level3(Level):
-    def __init__(self):
-        super().__init__()
+    hazard_count = 8
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
         self.grid_w, self.grid_h = 61, 41
 
-        self.walls = set()
-        for x in range(self.grid_w):
-            for y in range(self.grid_h):
-                self.walls.add((x, y))
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h, fill=WALL)
         self._carve_rect(2, 2, 58, 38)
 
         self.player = Player(4, 10)
@@ -100,13 +90,29 @@ class Level3(Level):
             Mirror(12, 10, "/"), Mirror(12, 6, "\\"), Mirror(30, 6, "\\"),
             Mirror(30, 12, "/"), Mirror(48, 12, "\\"), Mirror(48, 6, "/")
         ]
+        for m in self.mirrors:
+            self.entities.add(m)
+        rng = self.rng
         self.hazards = [
-            Hazard(random.randint(8, 50), random.randint(5, 30), *random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])) for
-            _ in range(8)]
+            Hazard(rng.randint(8, 50), rng.randint(5, 30), *rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)]), rng) for
+            _ in range(self.hazard_count)]
+
+        # Large numbers of hazards are stepped together as arrays
+        self.hazard_batch = None
+        if should_batch(len(self.hazards)):
+            self.hazard_batch = EntityBatch(self.walls)
+            for h in self.hazards:
+                self.hazard_batch.add_hazard(h)
+        else:
+            for h in self.hazards:
+                h.start(self.scheduler, self.player, self.walls)
 
         source = (5, 10, 1, 0)
         self.beam = LightBeam(source, self.mirrors, self.door)
 
+        # Deaths restart from here without rebuilding the walls
+        self.snapshot()
+
     def _carve_rect(self, x1, y1, x2, y2):
         for x in range(x1, x2 + 1):
             for y in range(y1, y2 + 1):
@@ -117,40 +123,63 @@ class Level3(Level):
         if event.type == pygame.KEYDOWN:
             # The arrow key logic is gone, but the spacebar logic remains.
             if event.key == pygame.K_SPACE:
-                for m in self.mirrors:
-                    if (m.x, m.y) == (self.player.x, self.player.y):
-                        m.rotate()
-                        self.beam.update()
+                m = self.entities.first(self.player.x, self.player.y, Mirror)
+                if m is not None:
+                    m.rotate()
+                    self.beam.mirror_rotated(m)
 
     def update(self):
         """Updates player movement and all puzzle/hazard logic."""
+        self.scheduler.tick()
+
         # --- NEW: Handle player's continuous movement ---
-        self.player.update(self.walls)  # For this level, only walls are obstacles.
+        self.player.update(self.walls, self.scheduler.now)  # For this level, only walls are obstacles.
 
-        # Update hazards and check if player was hit
-        for h in self.hazards:
-            if h.update(self.player, self.walls) == "reset":
-                print("Hit by hazard! Resetting level.")
-                self.__init__()
-                return
+        # Move the hazards that are due this tick and check if player was hit
+        events = self.scheduler.run_due()
+        if self.hazard_batch is not None and self.hazard_batch.step(self.player.x, self.player.y):
+            events.append("reset")
+        if "reset" in events:
+            print("Hit by hazard! Resetting level.")
+            self.reset()
+            return
 
         # Check for win condition
         if not self.door.locked and (self.player.x, self.player.y) == (self.door.x, self.door.y):
             print("Level 3 Complete!")
             self.is_complete = True
 
+    def get_state(self):
+        if self.hazard_batch is not None:
+            hazards = self.hazard_batch.positions()
+        else:
+            hazards = {(h.x, h.y) for h in self.hazards}
+        mirrors = [m.orientation for m in self.mirrors]
+        return super().get_state() + (sorted(hazards), mirrors, self.door.locked)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        tiles.update((m.x, m.y) for m in self.mirrors)
+        if self.hazard_batch is not None:
+            tiles.update(self.hazard_batch.positions())
+        else:
+            tiles.update((h.x, h.y) for h in self.hazards)
+        tiles.update(self.beam.path)
+        return tiles
+
     def draw(self, surface):
-        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        camx, camy = self.get_camera()
 
         surface.fill(BLACK)
 
-        for (x, y) in self.walls:
-            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        self.draw_walls(surface, camx, camy)
 
         for m in self.mirrors: m.draw(surface, camx, camy)
         self.beam.draw(surface, camx, camy)
         self.door.draw(surface, camx, camy)
-        for h in self.hazards: h.draw(surface, camx, camy)
+        if self.hazard_batch is not None:
+            self.hazard_batch.draw(surface, camx, camy, RED)
+        else:
+            for h in self.hazards: h.draw(surface, camx, camy)
         self.player.draw(surface, camx, camy)
@@ -2,8 +2,9 @@
 import pygame
 import random
 from settings import *
-from levels.level_base import Level
+from levels.level_base import Level, OccupancyGrid, WALL
 from game_objects import Player, Door, Enemy
+from entity_engine import EntityBatch, should_batch
 
 
 # --- Helper class specific to this level's puzzle ---
@@ -11,27 +12,35 @@ from game_objects import Player, Door, Enemy
 class MemoryPuzzle:
     """Manages the 'Simon Says' memory puzzle logic and drawing."""
 
-    def __init__(self, tiles, length=4):
+    def __init__(self, tiles, scheduler, length=4, rng=random):
         self.tiles = tiles
-        self.sequence = [random.choice(self.tiles) for _ in range(length)]
+        self.scheduler = scheduler
+        self.sequence = [rng.choice(self.tiles) for _ in range(length)]
         self.progress = []
-        self.show_index = 0
-        self.show_timer = 30
-        self.showing = True
+        self.show_duration = 30  # Frames each tile of the pattern is shown for
+        self.showing = False
         self.complete = False
         self.last_player_pos = None
+        self._start_showing(self.show_duration)
 
-    def update(self, player):
-        if self.complete:
+    def _start_showing(self, first_delay):
+        """Plays the pattern from the beginning, holding the first tile for first_delay frames."""
+        self.showing = True
+        self.show_index = 0
+        self.show_until = self.scheduler.now + first_delay
+        self.scheduler.call_at(self.show_until, self._show_next)
+
+    def _show_next(self):
+        """Scheduled callback that moves the pattern on to its next tile."""
+        self.show_index += 1
+        if self.show_index >= len(self.sequence):
+            self.showing = False
             return
+        self.show_until = self.scheduler.now + self.show_duration
+        self.scheduler.call_at(self.show_until, self._show_next)
 
-        if self.showing:
-            self.show_timer -= 1
-            if self.show_timer <= 0:
-                self.show_index += 1
-                self.show_timer = 30
-                if self.show_index >= len(self.sequence):
-                    self.showing = False
+    def update(self, player):
+        if self.complete or self.showing:
             return
 
         player_pos = (player.x, player.y)
@@ -41,9 +50,9 @@ class MemoryPuzzle:
             if self.progress[-1] != self.sequence[len(self.progress) - 1]:
                 print("Wrong sequence! Repeating the pattern.")
                 self.progress = []  # Clear the player's attempt
-                self.showing = True  # Go back to the showing phase
-                self.show_index = 0  # Start showing from the beginning
-                self.show_timer = 60  # Give a slightly longer pause before starting
+                # Go back to the showing phase, from the beginning,
+                # with a slightly longer pause before starting
+                self._start_showing(self.show_duration * 2)
             # --- End of change ---
             elif len(self.progress) == len(self.sequence):
                 print("Puzzle Solved!")
@@ -57,7 +66,7 @@ class MemoryPuzzle:
             pygame.draw.rect(surf, DARK_GRAY, rect, 2)
 
             if self.showing and self.show_index < len(self.sequence) and self.sequence[
-                self.show_index] == tile_pos and self.show_timer > 5:
+                self.show_index] == tile_pos and self.show_until - self.scheduler.now > 5:
                 pygame.draw.rect(surf, YELLOW, rect)
 
             if tile_pos in self.progress:
@@ -67,14 +76,14 @@ class MemoryPuzzle:
 # --- Main Level Class ---
 
 class Level4(Level):
-    def __init__(self):
-        super().__init__()
+    # Enemies past the three hand-placed ones patrol random rows (used for stress tests)
+    enemy_count = 3
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
         self.grid_w, self.grid_h = 61, 41
 
-        self.walls = set()
-        for x in range(self.grid_w):
-            for y in range(self.grid_h):
-                self.walls.add((x, y))
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h, fill=WALL)
         self._carve_rect(2, 2, 58, 38)
 
         self.player = Player(5, 20)
@@ -84,7 +93,7 @@ class Level4(Level):
         # --- CHANGE: The puzzle tiles are now closer to the player's start position ---
         tiles = [(10, 18), (12, 18), (14, 18), (16, 18),
                  (10, 22), (12, 22), (14, 22), (16, 22)]
-        self.puzzle = MemoryPuzzle(tiles, length=5)
+        self.puzzle = MemoryPuzzle(tiles, self.scheduler, length=5, rng=self.rng)
         # --- End of change ---
 
         self.enemies = [
@@ -92,6 +101,23 @@ class Level4(Level):
             Enemy(50, 30, [(50, 30), (25, 30)]),
             Enemy(38, 5, [(38, 5), (38, 35)])
         ]
+        for _ in range(self.enemy_count - len(self.enemies)):
+            y = self.rng.randint(3, 37)
+            x1, x2 = sorted(self.rng.sample(range(20, 58), 2))
+            self.enemies.append(Enemy(x1, y, [(x1, y), (x2, y)]))
+
+        # Large numbers of enemies are stepped together as arrays
+        self.enemy_batch = None
+        if should_batch(len(self.enemies)):
+            self.enemy_batch = EntityBatch(self.walls)
+            for en in self.enemies:
+                self.enemy_batch.add_enemy(en)
+        else:
+            for en in self.enemies:
+                en.start(self.scheduler, self.player)
+
+        # Deaths restart from here without rebuilding the walls
+        self.snapshot()
 
     def _carve_rect(self, x1, y1, x2, y2):
         for x in range(x1, x2 + 1):
@@ -102,14 +128,18 @@ class Level4(Level):
         pass
 
     def update(self):
-        self.player.update(self.walls)
+        self.scheduler.tick()
+        self.player.update(self.walls, self.scheduler.now)
         self.puzzle.update(self.player)
 
-        for en in self.enemies:
-            if en.update(self.player) == "reset":
-                print("Caught by enemy! Resetting level.")
-                self.__init__()
-                return
+        # Move the enemies (and the puzzle pattern) that are due this tick
+        events = self.scheduler.run_due()
+        if self.enemy_batch is not None and self.enemy_batch.step(self.player.x, self.player.y):
+            events.append("reset")
+        if "reset" in events:
+            print("Caught by enemy! Resetting level.")
+            self.reset()
+            return
 
         if self.puzzle.complete:
             self.door.locked = False
@@ -118,19 +148,37 @@ class Level4(Level):
             print("Level 4 Complete!")
             self.is_complete = True
 
+    def get_state(self):
+        if self.enemy_batch is not None:
+            enemies = self.enemy_batch.positions()
+        else:
+            enemies = {(en.x, en.y) for en in self.enemies}
+        puzzle = (self.puzzle.progress, self.puzzle.showing, self.puzzle.show_index, self.puzzle.complete)
+        return super().get_state() + (sorted(enemies), puzzle)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        tiles.update(self.puzzle.tiles)
+        if self.enemy_batch is not None:
+            tiles.update(self.enemy_batch.positions())
+        else:
+            tiles.update((en.x, en.y) for en in self.enemies)
+        return tiles
+
     def draw(self, surface):
-        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        camx, camy = self.get_camera()
 
         surface.fill(BLACK)
 
-        for (x, y) in self.walls:
-            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        self.draw_walls(surface, camx, camy)
 
         self.puzzle.draw(surface, camx, camy)
-        for en in self.enemies:
-            en.draw(surface, camx, camy)
+        if self.enemy_batch is not None:
+            self.enemy_batch.draw(surface, camx, camy, RED)
+        else:
+            for en in self.enemies:
+                en.draw(surface, camx, camy)
 
         self.door.draw(surface, camx, camy)
         self.player.draw(surface, camx, camy)
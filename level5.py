@@ -1,20 +1,21 @@
 # levels/level5.py
 import pygame
+import controls
 import random
 from settings import *
-from levels.level_base import Level
+from levels.level_base import Level, OccupancyGrid
 from game_objects import Player, Door, Boulder, PressurePlate
 
 
 # --- Main Level Class ---
 class Level5(Level):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, seed=None):
+        super().__init__(seed)
         self.grid_w, self.grid_h = 25, 20
-        self.walls = set()
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h)
 
         self.move_cooldown = 8
-        self.move_timer = 0
+        self.next_move_tick = 0  # First tick on which the player may move again
 
         self._create_layout()
         self.player = Player(4, 5)
@@ -30,6 +31,11 @@ class Level5(Level):
             PressurePlate(20, 9),
             PressurePlate(18, 14)
         ]
+        for obj in self.boulders + self.plates:
+            self.entities.add(obj)
+        for plate in self.plates:
+            plate.is_active = self.entities.first(plate.x, plate.y, Boulder) is not None
+        self.plates_pressed = sum(plate.is_active for plate in self.plates)
 
     def _create_layout(self):
         """Creates the rooms and corridors for the level."""
@@ -47,11 +53,10 @@ class Level5(Level):
 
     def update(self):
         """Updates player movement, puzzle logic, and win condition."""
-        if self.move_timer > 0:
-            self.move_timer -= 1
+        self.scheduler.tick()
 
-        if self.move_timer == 0:
-            keys = pygame.key.get_pressed()
+        if self.scheduler.now >= self.next_move_tick:
+            keys = controls.get_pressed()
             dx, dy = 0, 0
             if keys[pygame.K_LEFT]:
                 dx = -1
@@ -64,18 +69,9 @@ class Level5(Level):
 
             if dx != 0 or dy != 0:
                 self.try_move_player(dx, dy)
-                self.move_timer = self.move_cooldown
-
-        all_plates_active = True
-        boulder_positions = {(b.x, b.y) for b in self.boulders}
-        for plate in self.plates:
-            if (plate.x, plate.y) in boulder_positions:
-                plate.is_active = True
-            else:
-                plate.is_active = False
-                all_plates_active = False
+                self.next_move_tick = self.scheduler.now + self.move_cooldown
 
-        if all_plates_active:
+        if self.plates_pressed == len(self.plates):
             self.door.locked = False
 
         if not self.door.locked and (self.player.x, self.player.y) == (self.door.x, self.door.y):
@@ -87,14 +83,10 @@ class Level5(Level):
         target_x = self.player.x + dx
         target_y = self.player.y + dy
 
-        if (target_x, target_y) in self.walls:
+        if self.walls.is_blocked(target_x, target_y):
             return
 
-        boulder_to_push = None
-        for boulder in self.boulders:
-            if boulder.x == target_x and boulder.y == target_y:
-                boulder_to_push = boulder
-                break
+        boulder_to_push = self.entities.first(target_x, target_y, Boulder)
 
         if boulder_to_push is None:
             self.player.x = target_x
@@ -104,30 +96,48 @@ class Level5(Level):
             boulder_target_x = boulder_to_push.x + dx
             boulder_target_y = boulder_to_push.y + dy
 
-            if (boulder_target_x, boulder_target_y) in self.walls:
+            if self.walls.is_blocked(boulder_target_x, boulder_target_y):
+                return
+            if self.entities.first(boulder_target_x, boulder_target_y, Boulder) is not None:
                 return
-            for other_boulder in self.boulders:
-                if other_boulder.x == boulder_target_x and other_boulder.y == boulder_target_y:
-                    return
 
-            boulder_to_push.x = boulder_target_x
-            boulder_to_push.y = boulder_target_y
+            self._move_boulder(boulder_to_push, boulder_target_x, boulder_target_y)
             self.player.x = target_x
             self.player.y = target_y
 
+    def _move_boulder(self, boulder, x, y):
+        """Moves a boulder, switching the pressure plates it leaves and lands on."""
+        plate = self.entities.first(boulder.x, boulder.y, PressurePlate)
+        if plate is not None:
+            plate.is_active = False
+            self.plates_pressed -= 1
+        self.entities.move(boulder, x, y)
+        plate = self.entities.first(x, y, PressurePlate)
+        if plate is not None:
+            plate.is_active = True
+            self.plates_pressed += 1
+
+    def get_state(self):
+        boulders = [(b.x, b.y) for b in self.boulders]
+        return super().get_state() + (boulders, self.plates_pressed, self.next_move_tick)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        tiles.update((plate.x, plate.y) for plate in self.plates)
+        tiles.update((boulder.x, boulder.y) for boulder in self.boulders)
+        return tiles
+
     def draw(self, surface):
         # --- THIS IS THE UPDATED CODE ---
         # The camera now follows the player and clamps to the level's boundaries.
-        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        camx, camy = self.get_camera()
         # --- End of update ---
 
         surface.fill(BLACK)
 
         # Draw only the visible walls
-        for (x, y) in self.walls:
-            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        self.draw_walls(surface, camx, camy)
 
         for plate in self.plates: plate.draw(surface, camx, camy)
         for boulder in self.boulders: boulder.draw(surface, camx, camy)
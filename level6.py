@@ -1,8 +1,8 @@
 # levels/level6.py
 import pygame
 from settings import *
-from levels.level_base import Level
-from game_objects import Player, Door, Bridge
+from levels.level_base import Level, OccupancyGrid, ObstacleMap, compile_tile_map, ABYSS, BRIDGE
+from game_objects import Player, Door, Bridge, BridgeClock
 
 # --- NEW: Braided Path Layout ---
 # W = Wall (Solid Platform)
@@ -36,8 +36,8 @@ LEVEL6_MAP = [
 
 
 class Level6(Level):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, seed=None):
+        super().__init__(seed)
 
         self.grid_h = len(LEVEL6_MAP)
         self.grid_w = len(LEVEL6_MAP[0])
@@ -47,9 +47,23 @@ class Level6(Level):
 
         self.door.locked = False  # The challenge is timing
 
+        # The abyss never changes, so the map is compiled into a static layer once.
+        # Only bridge tiles are toggled afterwards, on the frames they flip.
+        self.obstacles = ObstacleMap(compile_tile_map(LEVEL6_MAP, {" ": ABYSS}))
+        for bridge in self.bridges:
+            self.obstacles.set_tile((bridge.x, bridge.y), BRIDGE, not bridge.is_solid)
+
+        # Bridges only do work on the ticks they flip
+        self.flipped_bridges = set()  # Tiles that flipped since the last draw
+        self.bridge_clock = BridgeClock(self.bridges, self._on_bridge_toggle, wheel=self.scheduler)
+
+    def _on_bridge_toggle(self, bridge):
+        self.obstacles.set_tile((bridge.x, bridge.y), BRIDGE, not bridge.is_solid)
+        self.flipped_bridges.add((bridge.x, bridge.y))
+
     def _create_layout(self):
         """Creates the maze layout based on the LEVEL6_MAP."""
-        self.walls = set()
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h)
 
         for y, row in enumerate(LEVEL6_MAP):
             for x, char in enumerate(row):
@@ -78,19 +92,7 @@ class Level6(Level):
         1. Vanished (non-solid) bridge tiles.
         2. Empty ' ' abyss tiles.
         """
-        obstacles = set()
-
-        for bridge in self.bridges:
-            if not bridge.is_solid:
-                obstacles.add((bridge.x, bridge.y))
-
-        # Add all empty spaces (' ') from the map as permanent obstacles
-        for y, row in enumerate(LEVEL6_MAP):
-            for x, char in enumerate(row):
-                if char == ' ':
-                    obstacles.add((x, y))
-
-        return obstacles
+        return self.obstacles.grid
 
     def handle_event(self, event):
         pass  # Player movement is handled in update()
@@ -98,29 +100,33 @@ class Level6(Level):
     def update(self):
         """Update player movement and the state of all bridges."""
         # Update all bridges first to determine where the player can move
-        for bridge in self.bridges:
-            bridge.update()
+        self.scheduler.advance()
 
         # Update player movement based on the *current* obstacle map
-        self.player.update(self.get_obstacles())
+        self.player.update(self.get_obstacles(), self.scheduler.now)
 
         # Check for win condition
         if not self.door.locked and (self.player.x, self.player.y) == (self.door.x, self.door.y):
             print("Level 6 Complete!")
             self.is_complete = True
 
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        # Bridges only change appearance when they flip
+        tiles.update(self.flipped_bridges)
+        self.flipped_bridges = set()
+        return tiles
+
     def draw(self, surface):
         """Draws the maze, bridges, and player."""
         # Camera follows player
-        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        camx, camy = self.get_camera()
 
         surface.fill(BLACK)
 
         # Draw solid 'W' platforms
-        for (x, y) in self.walls:
-            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        self.draw_walls(surface, camx, camy)
 
         # Draw bridges
         for bridge in self.bridges:
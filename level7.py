@@ -1,14 +1,14 @@
 # levels/level7.py
 import pygame
 from settings import *
-from levels.level_base import Level
+from levels.level_base import Level, OccupancyGrid, ObstacleMap, HAZARD
 # We need to import the Key class
 from game_objects import Player, Door, Gear, Key
 
 
 class Level7(Level):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, seed=None):
+        super().__init__(seed)
         self.grid_w, self.grid_h = 40, 25
 
         # --- Level Layout ---
@@ -31,10 +31,22 @@ class Level7(Level):
             Key(x=15, y=15),  # Between gear 1 and 2
             Key(x=30, y=11)  # Tucked under gear 3
         ]
+        for k in self.keys:
+            self.entities.add(k)
+        self.keys_left = len(self.keys)
+
+        # --- Obstacles: walls + gear axles are static, spokes are patched as gears turn ---
+        self.obstacles = ObstacleMap(self.walls)
+        for i, gear in enumerate(self.gears):
+            self.obstacles.set_layer(("axle", i), {gear.get_axle_tile()}, HAZARD)
+        self._sync_gears()
+
+        # Deaths restart from here without rebuilding the walls
+        self.snapshot()
 
     def _create_layout(self):
         """Creates a simple room."""
-        self.walls = set()
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h)
         for x in range(self.grid_w):
             for y in range(self.grid_h):
                 if x == 0 or x == self.grid_w - 1 or y == 0 or y == self.grid_h - 1:
@@ -47,11 +59,12 @@ class Level7(Level):
         2. Spinning gear spokes
         3. Gear axles (the center)
         """
-        obstacles = self.walls.copy()
-        for gear in self.gears:
-            obstacles.update(gear.get_hazard_tiles())
-            obstacles.add(gear.get_axle_tile())  # Add center axle as an obstacle
-        return obstacles
+        return self.obstacles.grid
+
+    def _sync_gears(self):
+        """Moves each gear's spoke layer to its current angle."""
+        for i, gear in enumerate(self.gears):
+            self.obstacles.set_layer(("spokes", i), gear.get_hazard_tiles(), HAZARD)
 
     def handle_event(self, event):
         """No interaction (like SPACE) is needed for this level."""
@@ -59,47 +72,59 @@ class Level7(Level):
 
     def update(self):
         """Update player, gears, and check for hazards/wins."""
+        self.scheduler.tick()
+
         # Update player movement, aware of gear hazards
-        self.player.update(self.get_obstacles())
+        self.player.update(self.get_obstacles(), self.scheduler.now)
 
-        all_hazards = set()
         # Update all gears
         for gear in self.gears:
             gear.update()
-            all_hazards.update(gear.get_hazard_tiles())
-            all_hazards.add(gear.get_axle_tile())  # Axle is also a hazard
+        self._sync_gears()
 
         # --- Action Element: Check for player death ---
-        if (self.player.x, self.player.y) in all_hazards:
+        # Swept tiles are checked so a fast gear can't jump over the player
+        if any(gear.hits(self.player.x, self.player.y) for gear in self.gears):
             print("Hit by gear! Resetting level.")
-            self.__init__()  # Reload the level
+            self.reset()  # Reload the level
             return
 
         # --- Key Collection Logic ---
-        for k in self.keys:
-            if not k.collected and (self.player.x, self.player.y) == (k.x, k.y):
+        for k in self.entities.at(self.player.x, self.player.y, Key):
+            if not k.collected:
                 k.collected = True
+                self.keys_left -= 1
                 print("Collected a key!")
 
         # --- Win Condition Logic ---
-        if all(k.collected for k in self.keys):
+        if self.keys_left == 0:
             self.door.locked = False
 
         if not self.door.locked and (self.player.x, self.player.y) == (self.door.x, self.door.y):
             print("Level 7 Complete!")
             self.is_complete = True
 
+    def get_state(self):
+        gears = [gear.current_angle for gear in self.gears]
+        return super().get_state() + (self.keys_left, gears)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y)}
+        tiles.update((k.x, k.y) for k in self.keys)
+        for gear in self.gears:
+            tiles.update(gear.get_hazard_tiles())
+            tiles.add(gear.get_axle_tile())
+        return tiles
+
     def draw(self, surface):
         """Draws the room, gears, player, and door."""
-        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        camx, camy = self.get_camera()
 
         surface.fill(BLACK)
 
         # Draw walls
-        for (x, y) in self.walls:
-            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        self.draw_walls(surface, camx, camy)
 
         # Draw gears
         for gear in self.gears:
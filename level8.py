@@ -1,10 +1,12 @@
 # levels/level8.py
 import pygame
+import controls
 from settings import *
-from levels.level_base import Level
+from levels.level_base import Level, OccupancyGrid, ObstacleMap, HAZARD, BRIDGE, BLOCKER, ALL_LAYERS
 from game_objects import Player, Door, ChaserEnemy
-from game_objects import Boulder, PressurePlate, Gear, Bridge
-from game_objects import Mirror
+from game_objects import Boulder, PressurePlate, Gear, Bridge, BridgeClock
+from game_objects import Mirror, BeamTracer
+from pathfinding import FlowField
 
 
 # --- LIGHTBEAM HELPER CLASS ---
@@ -18,6 +20,7 @@ class LightBeam:
         self.path = []
         self.is_active = False
         self.grid_w, self.grid_h = grid_w, grid_h
+        self.tracer = BeamTracer(mirrors, (door.x, door.y), (grid_w - 1, grid_h - 1), grid_w * grid_h)
 
     def update(self):
         """Calculates the beam's path if it's active."""
@@ -26,28 +29,15 @@ class LightBeam:
             self.door.locked = True
             return
 
-        self.door.locked = True
-        self.path = []
-        x, y, dx, dy = self.source
-
-        for _ in range(self.grid_w * self.grid_h):
-            x += dx;
-            y += dy
-            self.path.append((x, y))
+        self.path, reached = self.tracer.trace(self.source)
+        self.door.locked = not reached
 
-            if (x, y) == (self.door.x, self.door.y):
-                self.door.locked = False
-                break
-
-            mirror_hit = False
-            for m in self.mirrors:
-                if (x, y) == (m.x, m.y):
-                    dx, dy = (-dy, -dx) if m.orientation == "/" else (dy, dx)
-                    mirror_hit = True
-                    break
-
-            if not mirror_hit and not (0 < x < self.grid_w - 1 and 0 < y < self.grid_h - 1):
-                break
+    def mirror_rotated(self, mirror):
+        """Updates the beam after `mirror` was rotated, retracing only the part past it."""
+        if not self.is_active:
+            return  # Traced in full when the beam is switched on
+        self.path, reached = self.tracer.retrace_after(mirror)
+        self.door.locked = not reached
 
     def draw(self, surf, camx, camy):
         if not self.is_active:
@@ -62,10 +52,10 @@ class LightBeam:
 
 
 class Level8(Level):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, seed=None):
+        super().__init__(seed)
         self.grid_w, self.grid_h = 30, 20
-        self.walls = set()
+        self.walls = OccupancyGrid(self.grid_w, self.grid_h)
 
         for x in range(self.grid_w):
             for y in range(self.grid_h):
@@ -109,41 +99,66 @@ class Level8(Level):
 
         self.beam = LightBeam(self.light_source_pos, self.mirrors, self.door, self.grid_w, self.grid_h)
 
+        for obj in self.boulders + self.plates + self.mirrors:
+            self.entities.add(obj)
+        for plate in self.plates:
+            plate.is_active = self.entities.first(plate.x, plate.y, Boulder) is not None
+        self.plates_pressed = sum(plate.is_active for plate in self.plates)
+
         self.move_cooldown = 8
-        self.move_timer = 0
+        self.next_move_tick = 0  # First tick on which the player may move again
+
+        # --- Obstacles ---
+        # Walls, axles and mirrors never change; spokes, bridges and boulders
+        # are patched in place when they move. Boulders and mirrors are on the
+        # BLOCKER layer: they stop the chaser and pushed boulders, not the player.
+        self.obstacles = ObstacleMap(self.walls)
+        for i, gear in enumerate(self.gears):
+            self.obstacles.set_layer(("axle", i), {gear.get_axle_tile()}, HAZARD)
+        self.obstacles.set_layer("mirrors", {(m.x, m.y) for m in self.mirrors}, BLOCKER)
+        for b in self.boulders:
+            self.obstacles.set_tile((b.x, b.y), BLOCKER, True)
+        for bridge in self.bridges:
+            self.obstacles.set_tile((bridge.x, bridge.y), BRIDGE, not bridge.is_solid)
+        self._sync_gears()
+        self.bridge_clock = BridgeClock(self.bridges, self._on_bridge_toggle)
+        # The chaser is also blocked by boulders and mirrors. It follows a
+        # distance map to the player that is only rebuilt when the player or the obstacles move.
+        self.flow_field = FlowField(self.obstacles.grid)
+        self.chaser.start(self.scheduler, self.player, self.obstacles.grid, self.flow_field)
+        self.player_obstacles = self.obstacles.grid.view(ALL_LAYERS & ~BLOCKER)
+
+        # Deaths restart from here without rebuilding the walls
+        self.snapshot()
 
     def get_obstacles(self):
         """Returns all impassable tiles (walls, gear axles, spokes, bridges)."""
-        obstacles = self.walls.copy()
-
-        for gear in self.gears:
-            obstacles.update(gear.get_hazard_tiles())
-            obstacles.add(gear.get_axle_tile())
+        return self.player_obstacles
 
-        for bridge in self.bridges:
-            if not bridge.is_solid:
-                obstacles.add((bridge.x, bridge.y))
+    def _sync_gears(self):
+        """Moves each gear's spoke layer to its current angle."""
+        for i, gear in enumerate(self.gears):
+            self.obstacles.set_layer(("spokes", i), gear.get_hazard_tiles(), HAZARD)
 
-        return obstacles
+    def _on_bridge_toggle(self, bridge):
+        self.obstacles.set_tile((bridge.x, bridge.y), BRIDGE, not bridge.is_solid)
 
     def handle_event(self, event):
         """Handles player input."""
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
-                for mirror in self.mirrors:
-                    if (self.player.x, self.player.y) == (mirror.x, mirror.y):
-                        mirror.rotate()
-                        self.beam.update()  # Recalculate beam path
-                        break
+                mirror = self.entities.first(self.player.x, self.player.y, Mirror)
+                if mirror is not None:
+                    mirror.rotate()
+                    self.beam.mirror_rotated(mirror)  # Recalculate beam path
 
     def update(self):
         """Updates all game logic for the level."""
 
-        if self.move_timer > 0:
-            self.move_timer -= 1
+        self.scheduler.tick()
 
-        if self.move_timer == 0:
-            keys = pygame.key.get_pressed()
+        if self.scheduler.now >= self.next_move_tick:
+            keys = controls.get_pressed()
             dx, dy = 0, 0
             if keys[pygame.K_LEFT]:
                 dx = -1
@@ -156,46 +171,33 @@ class Level8(Level):
 
             if dx != 0 or dy != 0:
                 self.try_move_player(dx, dy)
-                self.move_timer = self.move_cooldown
+                self.next_move_tick = self.scheduler.now + self.move_cooldown
 
         for gear in self.gears:
             gear.update()
 
-        for bridge in self.bridges:
-            bridge.update()
+        self.bridge_clock.advance()
 
-        chaser_obstacles = self.get_obstacles().copy()
-        for b in self.boulders:
-            chaser_obstacles.add((b.x, b.y))
-        for m in self.mirrors:
-            chaser_obstacles.add((m.x, m.y))
+        self._sync_gears()
 
-        if self.chaser.update(self.player, chaser_obstacles) == "reset":
+        # Move the chaser if it is due this tick
+        if "reset" in self.scheduler.run_due():
             print("Caught by the chaser! Resetting level.")
-            self.__init__()
+            self.reset()
             return
 
-        all_hazards = set()
-        for gear in self.gears:
-            all_hazards.update(gear.get_hazard_tiles())
-            all_hazards.add(gear.get_axle_tile())
-
-        if (self.player.x, self.player.y) in all_hazards:
+        # Swept tiles are checked so a fast gear can't jump over the player
+        if any(gear.hits(self.player.x, self.player.y) for gear in self.gears):
             print("Hit by gear! Resetting level.")
-            self.__init__()
+            self.reset()
             return
 
-        boulder_positions = {(b.x, b.y) for b in self.boulders}
-        all_plates_active = True
-        for plate in self.plates:
-            if (plate.x, plate.y) in boulder_positions:
-                plate.is_active = True
-            else:
-                plate.is_active = False
-                all_plates_active = False
+        all_plates_active = self.plates_pressed == len(self.plates)
 
-        self.beam.is_active = all_plates_active
-        self.beam.update()
+        # The beam only changes when the plates do or a mirror is rotated
+        if self.beam.is_active != all_plates_active:
+            self.beam.is_active = all_plates_active
+            self.beam.update()
 
         if not self.door.locked and (self.player.x, self.player.y) == (self.door.x, self.door.y):
             print("Level 8 Complete! YOU WIN!")
@@ -206,14 +208,10 @@ class Level8(Level):
         target_x = self.player.x + dx
         target_y = self.player.y + dy
 
-        if (target_x, target_y) in self.get_obstacles():
+        if self.get_obstacles().is_blocked(target_x, target_y):
             return
 
-        boulder_to_push = None
-        for boulder in self.boulders:
-            if boulder.x == target_x and boulder.y == target_y:
-                boulder_to_push = boulder
-                break
+        boulder_to_push = self.entities.first(target_x, target_y, Boulder)
 
         if boulder_to_push is None:
             # Player can move onto mirrors, so no special check needed
@@ -225,30 +223,55 @@ class Level8(Level):
             boulder_target_x = boulder_to_push.x + dx
             boulder_target_y = boulder_to_push.y + dy
 
-            if (boulder_target_x, boulder_target_y) in self.get_obstacles():
+            # Blocked by terrain, other boulders or mirrors
+            if self.obstacles.grid.is_blocked(boulder_target_x, boulder_target_y):
                 return
-            for other_boulder in self.boulders:
-                if other_boulder.x == boulder_target_x and other_boulder.y == boulder_target_y:
-                    return
-            for m in self.mirrors:
-                if (boulder_target_x, boulder_target_y) == (m.x, m.y):
-                    return
-
-            boulder_to_push.x = boulder_target_x
-            boulder_to_push.y = boulder_target_y
+
+            self._move_boulder(boulder_to_push, boulder_target_x, boulder_target_y)
             self.player.x = target_x
             self.player.y = target_y
 
+    def _move_boulder(self, boulder, x, y):
+        """Moves a boulder, switching the pressure plates it leaves and lands on."""
+        # Boulders never share a tile with a mirror, so their BLOCKER tile can be flipped directly
+        self.obstacles.set_tile((boulder.x, boulder.y), BLOCKER, False)
+        plate = self.entities.first(boulder.x, boulder.y, PressurePlate)
+        if plate is not None:
+            plate.is_active = False
+            self.plates_pressed -= 1
+        self.entities.move(boulder, x, y)
+        self.obstacles.set_tile((x, y), BLOCKER, True)
+        plate = self.entities.first(x, y, PressurePlate)
+        if plate is not None:
+            plate.is_active = True
+            self.plates_pressed += 1
+
+    def get_state(self):
+        boulders = [(b.x, b.y) for b in self.boulders]
+        mirrors = [m.orientation for m in self.mirrors]
+        gears = [(gear.current_angle, gear.is_rotating) for gear in self.gears]
+        return super().get_state() + ((self.chaser.x, self.chaser.y), boulders, mirrors, gears,
+                                      self.plates_pressed, self.next_move_tick)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        tiles = {(self.player.x, self.player.y), (self.door.x, self.door.y),
+                 (self.chaser.x, self.chaser.y)}
+        for group in (self.plates, self.mirrors, self.boulders, self.bridges):
+            tiles.update((obj.x, obj.y) for obj in group)
+        for gear in self.gears:
+            tiles.update(gear.get_hazard_tiles())
+            tiles.add(gear.get_axle_tile())
+        tiles.update(self.beam.path)
+        return tiles
+
     def draw(self, surface):
         """Draws all level elements."""
-        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
-        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        camx, camy = self.get_camera()
 
         surface.fill(BLACK)
 
-        for (x, y) in self.walls:
-            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
-                pygame.draw.rect(surface, GRAY, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        self.draw_walls(surface, camx, camy)
 
         for plate in self.plates:
             plate.draw(surface, camx, camy)
@@ -1,4 +1,210 @@
 # levels/level_base.py
+import copy
+import random
+import zlib
+import pygame
+from settings import *
+from scheduler import TimerWheel
+
+
+# --- Obstacle layers ---
+# Each cell of an OccupancyGrid is a byte of layer flags, so one grid can hold
+# walls, gates, abyss, bridges and hazards at the same time.
+WALL = 1
+GATE = 2
+ABYSS = 4
+BRIDGE = 8  # A bridge tile that has currently vanished
+HAZARD = 16  # Gear spokes and axles
+BLOCKER = 32  # Solid objects like boulders and mirrors
+ALL_LAYERS = 0xFF
+
+
+class OccupancyGrid:
+    """
+    A compact obstacle map for a grid of w x h tiles, stored in a bytearray
+    indexed by y * w + x. It behaves like the old set of (x, y) tuples
+    (`(x, y) in grid`, add, discard, iteration), but is_blocked(x, y) lets hot
+    code test a tile without building a tuple. Tiles outside the grid are never blocked.
+    """
+
+    def __init__(self, w, h, fill=0, mask=ALL_LAYERS):
+        self.w, self.h = w, h
+        self.cells = bytearray([fill]) * (w * h)
+        # Only flags in the mask count as blocking (see view())
+        self.mask = mask
+        # Bumped on every change so caches can tell when the grid was modified
+        self.version = 0
+
+    def is_blocked(self, x, y):
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return self.cells[y * self.w + x] & self.mask != 0
+        return False
+
+    def __contains__(self, pos):
+        return self.is_blocked(pos[0], pos[1])
+
+    def __iter__(self):
+        w, mask = self.w, self.mask
+        for i, flags in enumerate(self.cells):
+            if flags & mask:
+                yield (i % w, i // w)
+
+    def __len__(self):
+        return sum(1 for flags in self.cells if flags & self.mask)
+
+    def flags_at(self, x, y):
+        """Returns the raw layer flags of a tile (0 outside the grid)."""
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return self.cells[y * self.w + x]
+        return 0
+
+    def add(self, pos, layer=WALL):
+        x, y = pos
+        if 0 <= x < self.w and 0 <= y < self.h:
+            self.cells[y * self.w + x] |= layer
+            self.version += 1
+
+    def discard(self, pos, layer=ALL_LAYERS):
+        x, y = pos
+        if 0 <= x < self.w and 0 <= y < self.h:
+            self.cells[y * self.w + x] &= ~layer & 0xFF
+            self.version += 1
+
+    def update(self, tiles, layer=WALL):
+        for pos in tiles:
+            self.add(pos, layer)
+
+    def copy(self):
+        grid = OccupancyGrid(self.w, self.h, mask=self.mask)
+        grid.cells[:] = self.cells
+        return grid
+
+    def view(self, mask):
+        """
+        Returns a grid sharing the same cells that only treats the given
+        layers as blocking. Changes made through either grid are seen by both.
+        """
+        grid = OccupancyGrid(0, 0, mask=mask)
+        grid.w, grid.h, grid.cells = self.w, self.h, self.cells
+        return grid
+
+
+def compile_tile_map(rows, layers):
+    """
+    Builds an OccupancyGrid from a map made of strings (one string per row).
+    `layers` maps a map character to the layer flag its tiles should get,
+    e.g. {" ": ABYSS}. Characters not in `layers` are left empty.
+    """
+    grid = OccupancyGrid(max(len(row) for row in rows), len(rows))
+    for y, row in enumerate(rows):
+        for x, char in enumerate(row):
+            flag = layers.get(char)
+            if flag:
+                grid.add((x, y), flag)
+    return grid
+
+
+class ObstacleMap:
+    """
+    Keeps one obstacle grid for a level up to date as its dynamic layers change.
+    The static walls are copied in once. Gears, bridges, gates and other moving
+    layers are patched only when their tiles actually change, so every caller in
+    a frame gets the same grid object and nothing is rebuilt per call.
+    """
+
+    def __init__(self, walls):
+        self.grid = walls.copy()
+        # key -> (layer flag, frozenset of tiles)
+        self._layers = {}
+
+    def __deepcopy__(self, memo):
+        # Layer tile sets are frozen, so a copy only needs its own grid
+        obstacles = ObstacleMap.__new__(ObstacleMap)
+        memo[id(self)] = obstacles
+        obstacles.grid = copy.deepcopy(self.grid, memo)
+        obstacles._layers = dict(self._layers)
+        return obstacles
+
+    @property
+    def version(self):
+        """Changes whenever any tile of the grid changes."""
+        return self.grid.version
+
+    def set_layer(self, key, tiles, flag):
+        """
+        Sets the tiles covered by a named layer (e.g. one gear's spokes).
+        Does nothing if they are the same as last time.
+        """
+        old = self._layers.get(key)
+        if old is not None and old[1] == tiles:
+            return
+        tiles = frozenset(tiles)
+        self._layers[key] = (flag, tiles)
+
+        if old is not None:
+            # Only clear a tile if no other layer with the same flag still covers it
+            for pos in old[1] - tiles:
+                if not any(f == flag and pos in t for k, (f, t) in self._layers.items()):
+                    self.grid.discard(pos, flag)
+        for pos in tiles:
+            self.grid.add(pos, flag)
+
+    def set_tile(self, pos, flag, on):
+        """Turns a single tile's flag on or off (e.g. a bridge or a gate)."""
+        if bool(self.grid.flags_at(*pos) & flag) == on:
+            return
+        if on:
+            self.grid.add(pos, flag)
+        else:
+            self.grid.discard(pos, flag)
+
+
+class SpatialHash:
+    """
+    Maps each tile to the objects standing on it (keys, switches, boulders,
+    mirrors, plates...), so "what is at (x, y)" is a dict lookup instead of a
+    scan over every object. Objects that move must go through move() so their
+    bucket follows them.
+    """
+
+    def __init__(self, objects=()):
+        self.buckets = {}  # (x, y) -> list of objects on that tile
+        for obj in objects:
+            self.add(obj)
+
+    def add(self, obj):
+        self.buckets.setdefault((obj.x, obj.y), []).append(obj)
+
+    def remove(self, obj):
+        pos = (obj.x, obj.y)
+        bucket = self.buckets[pos]
+        bucket.remove(obj)
+        if not bucket:
+            del self.buckets[pos]
+
+    def move(self, obj, x, y):
+        """Moves obj to (x, y), keeping its bucket up to date."""
+        self.remove(obj)
+        obj.x, obj.y = x, y
+        self.add(obj)
+
+    def at(self, x, y, kind=None):
+        """Returns the objects on (x, y), optionally only those that are instances of `kind`."""
+        bucket = self.buckets.get((x, y), ())
+        if kind is None:
+            return list(bucket)
+        return [obj for obj in bucket if isinstance(obj, kind)]
+
+    def first(self, x, y, kind):
+        """Returns the first `kind` object on (x, y), or None."""
+        for obj in self.buckets.get((x, y), ()):
+            if isinstance(obj, kind):
+                return obj
+        return None
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
 
 class Level:
     """
@@ -7,15 +213,53 @@ class Level:
     The main game loop in main.py will call these methods on the currently active level.
     """
 
-    def __init__(self):
+    # Color used for the static wall layer. Levels can override this.
+    wall_color = GRAY
+
+    # Name shown on the banner before the level starts (None means "Level N").
+    title = None
+
+    # Attributes that never change after construction. reset() shares them
+    # with the snapshot instead of copying them. Levels can extend this.
+    static_attributes = ("walls",)
+
+    # Drawing caches describe what is on screen, not the level's state, so
+    # reset() leaves them alone.
+    _unsnapshotted = ("_snapshot", "_wall_layer", "_wall_layer_key", "_last_camera", "_last_dynamic_tiles")
+
+    def __init__(self, seed=None):
         # A flag to signal to the main loop when the level is complete.
         self.is_complete = False
 
+        # All of the level's randomness comes from its own stream, so the same
+        # seed and the same input always play out the same way.
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+
         # Every level should create its own player instance.
         self.player = None
 
-        # Every level should have a set of wall coordinates for collision.
-        self.walls = set()
+        # The level's clock. Objects that only act every few frames register
+        # "call me at tick N" here instead of counting down every frame.
+        self.scheduler = TimerWheel()
+
+        # Every level should have a grid of wall tiles for collision.
+        self.walls = OccupancyGrid(0, 0)
+
+        # Keys, switches, boulders, mirrors and other objects, indexed by tile.
+        self.entities = SpatialHash()
+
+        # Copy of the starting state taken by snapshot(), used by reset().
+        self._snapshot = None
+
+        # Pre-rendered surface holding every wall tile of the level.
+        # It is built on the first draw and only rebuilt when the walls change.
+        self._wall_layer = None
+        self._wall_layer_key = None
+
+        # State from the last presented frame, used to work out dirty regions.
+        self._last_camera = None
+        self._last_dynamic_tiles = set()
 
     def handle_event(self, event):
         """
@@ -39,10 +283,125 @@ class Level:
         """
         pass
 
+    # --- Restarting ---
+    def _shared_memo(self):
+        """A deepcopy memo that maps the level itself and its static attributes to themselves."""
+        memo = {id(self): self}
+        for name in self.static_attributes:
+            value = getattr(self, name)
+            memo[id(value)] = value
+        return memo
+
+    def snapshot(self):
+        """
+        Saves a copy of the level's current state for reset(). Levels that can
+        be restarted call this at the end of __init__.
+        """
+        state = {k: v for k, v in vars(self).items() if k not in self._unsnapshotted}
+        self._snapshot = copy.deepcopy(state, self._shared_memo())
+
+    def reset(self):
+        """
+        Puts the level back to the state saved by snapshot(). Only the mutable
+        state (player, enemies, gears, puzzles...) is copied; the walls and
+        other static attributes are shared, so nothing is rebuilt.
+        """
+        if self._snapshot is None:
+            self.__init__(self.seed)
+            return
+        vars(self).update(copy.deepcopy(self._snapshot, self._shared_memo()))
+
+    def get_state(self):
+        """
+        Returns a tuple of everything that can change while the level is
+        played, used to check that a replay plays out exactly as recorded.
+        Levels with more moving parts add them to this.
+        """
+        return (self.scheduler.now, self.player.x, self.player.y, self.is_complete)
+
+    def state_checksum(self):
+        """A CRC-32 of get_state()."""
+        return zlib.crc32(repr(self.get_state()).encode())
+
     def get_obstacles(self):
         """
-        Returns a set of all grid coordinates that the player cannot move into.
+        Returns an OccupancyGrid of all tiles that the player cannot move into.
         By default, this is just the walls, but levels can add things like
         closed gates or other temporary barriers.
         """
         return self.walls
+
+    def get_camera(self):
+        """Returns the top-left tile of the view, following the player and clamped to the grid."""
+        camx = max(0, min(self.player.x - VIEW_W // 2, self.grid_w - VIEW_W))
+        camy = max(0, min(self.player.y - VIEW_H // 2, self.grid_h - VIEW_H))
+        return camx, camy
+
+    def get_dynamic_tiles(self):
+        """
+        Returns the set of tiles whose appearance can change from one frame to the next
+        (the player, enemies, doors, switches...). Levels override this to enable
+        dirty-rectangle updates; returning None means "redraw everything".
+        """
+        return None
+
+    def get_dirty_rects(self):
+        """
+        Returns the screen rectangles that changed since the last call, or None if
+        the whole screen must be updated (first frame, camera scrolled, or the level
+        does not report its dynamic tiles).
+        """
+        camera = self.get_camera()
+        tiles = self.get_dynamic_tiles()
+        previous = self._last_dynamic_tiles
+        scrolled = camera != self._last_camera
+        self._last_camera = camera
+        self._last_dynamic_tiles = tiles if tiles is not None else set()
+        if tiles is None or scrolled:
+            return None
+
+        camx, camy = camera
+        rects = []
+        for (x, y) in tiles | previous:
+            if camx <= x < camx + VIEW_W and camy <= y < camy + VIEW_H:
+                rects.append(pygame.Rect((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+        return rects
+
+    # --- Static wall layer ---
+    def invalidate_wall_layer(self):
+        """Forces the wall layer to be rebuilt on the next draw."""
+        self._wall_layer = None
+        self._wall_layer_key = None
+
+    def _build_wall_layer(self):
+        """Renders every wall tile once onto an off-screen surface the size of the whole grid."""
+        layer = pygame.Surface((self.grid_w * TILE, self.grid_h * TILE))
+        layer.fill(BLACK)
+        for (x, y) in self.walls:
+            layer.fill(self.wall_color, (x * TILE, y * TILE, TILE, TILE))
+        return layer
+
+    def _draw_visible_walls(self, surface, camx, camy):
+        """Draws the wall tiles inside the camera view one by one."""
+        walls, color = self.walls, self.wall_color
+        for y in range(camy, camy + VIEW_H):
+            for x in range(camx, camx + VIEW_W):
+                if walls.is_blocked(x, y):
+                    surface.fill(color, ((x - camx) * TILE, (y - camy) * TILE, TILE, TILE))
+
+    def draw_walls(self, surface, camx, camy):
+        """
+        Blits the visible window of the cached wall layer onto the surface.
+        The layer is rebuilt only if the wall grid was replaced or modified.
+        Grids too big for one surface are drawn tile by tile instead.
+        """
+        if self.grid_w * self.grid_h > WALL_LAYER_MAX_TILES:
+            self._draw_visible_walls(surface, camx, camy)
+            return
+
+        key = (id(self.walls), self.walls.version, self.grid_w, self.grid_h)
+        if self._wall_layer is None or key != self._wall_layer_key:
+            self._wall_layer = self._build_wall_layer()
+            self._wall_layer_key = key
+
+        surface.blit(self._wall_layer, (0, 0), (camx * TILE, camy * TILE, VIEW_W * TILE, VIEW_H * TILE))
@@ -0,0 +1,57 @@
+# levels/level_endless.py
+import pygame
+from settings import *
+from levels.level_base import Level
+from game_objects import Player
+from maze import ChunkedMaze
+
+
+class EndlessMaze(Level):
+    """
+    Endless mode: a maze that goes on forever in every direction.
+    The world is generated chunk by chunk around the camera and never completes.
+    """
+
+    title = "Endless Maze"
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.walls = ChunkedMaze(self.seed)
+        self.player = Player(1, 1)  # Always a room: rooms sit on odd tiles
+        self._loaded_camera = None
+
+    def get_camera(self):
+        """The view is centred on the player; there are no edges to clamp to."""
+        return self.player.x - VIEW_W // 2, self.player.y - VIEW_H // 2
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        self.scheduler.tick()
+        self.player.update(self.walls, self.scheduler.now)
+
+        # Generate the chunks just outside the view before they scroll in
+        camera = self.get_camera()
+        if camera != self._loaded_camera:
+            self._loaded_camera = camera
+            camx, camy = camera
+            margin = self.walls.chunk_size // 2
+            self.walls.ensure_area(camx - margin, camy - margin,
+                                   camx + VIEW_W + margin, camy + VIEW_H + margin)
+
+    def get_dynamic_tiles(self):
+        """Tiles that can change between frames, used for dirty-rectangle updates."""
+        return {(self.player.x, self.player.y)}
+
+    def draw_walls(self, surface, camx, camy):
+        # The maze has no size to pre-render, so only the visible tiles are drawn
+        self._draw_visible_walls(surface, camx, camy)
+
+    def draw(self, surface):
+        camx, camy = self.get_camera()
+
+        surface.fill(BLACK)
+
+        self.draw_walls(surface, camx, camy)
+        self.player.draw(surface, camx, camy)
@@ -0,0 +1,259 @@
+# maze.py
+import itertools
+import random
+from collections import OrderedDict
+from settings import *
+from levels.level_base import OccupancyGrid, WALL, ALL_LAYERS
+
+# Mazes live on the odd tiles of the grid: every tile with odd x and odd y is
+# a room, and the tile between two neighbouring rooms is the passage joining
+# them. Generators work on flat indices (y * w + x) into the grid's bytearray
+# and never build per-tile tuples.
+
+
+def _rooms(w, h):
+    """
+    Returns a bytearray marking every room with 1, padded with 2 * w zero bytes
+    at the end. Stepping two tiles in any direction from a room lands either on
+    another room or on a 0 (a wall, the padding, or, for negative indices, the
+    bottom wall row), so generators don't need bounds checks.
+    """
+    rooms = bytearray(w * h + 2 * w)
+    per_row = len(range(1, w - 1, 2))
+    for y in range(1, h - 1, 2):
+        rooms[y * w + 1:y * w + 1 + 2 * per_row:2] = b"\x01" * per_row
+    return rooms
+
+
+# Random bytes 240-255 are dropped so each of the 24 orderings (repeated 10
+# times to fill 0-239) is equally likely
+_UNEVEN_BYTES = bytes(range(240, 256))
+
+
+def _step_orders(w):
+    """All 24 orderings of the four two-tile steps, repeated to cover the byte values 0-239."""
+    return list(itertools.permutations((2, -2, 2 * w, -2 * w))) * 10
+
+
+def _random_orders(rng, orders):
+    """
+    Returns an iterator over a batch of random step orderings. Randomness is
+    drawn in bulk, a byte per ordering, which is much cheaper than a call per choice.
+    """
+    return iter([orders[r] for r in rng.randbytes(65536).translate(None, _UNEVEN_BYTES)])
+
+
+def _open_rooms(cells, w, h):
+    """Opens every room at once (generators only carve passages between them)."""
+    per_row = len(range(1, w - 1, 2))
+    for y in range(1, h - 1, 2):
+        cells[y * w + 1:y * w + 1 + 2 * per_row:2] = bytes(per_row)
+
+
+def _backtracker(cells, w, h, rng, start):
+    """Recursive backtracker: long winding corridors with few dead ends."""
+    unvisited = _rooms(w, h)
+    orders = _step_orders(w)
+    batch = iter(())
+    unvisited[start] = 0
+    stack = [start]
+    push, pop = stack.append, stack.pop
+    while stack:
+        i = pop()
+        # Walk on from i until a dead end, leaving a trail to come back along
+        while True:
+            order = next(batch, None)
+            if order is None:
+                batch = _random_orders(rng, orders)
+                order = next(batch)
+            a, b, c, d = order
+            if unvisited[i + a]: pass
+            elif unvisited[i + b]: a = b
+            elif unvisited[i + c]: a = c
+            elif unvisited[i + d]: a = d
+            else: break
+            push(i)
+            i += a
+            unvisited[i] = 0
+            cells[i - a // 2] = 0
+    _open_rooms(cells, w, h)
+
+
+def _prim(cells, w, h, rng, start):
+    """Randomized Prim's: grows from the start in every direction, many short dead ends."""
+    unvisited = _rooms(w, h)
+    orders = _step_orders(w)
+    batch = iter(())
+    rand = rng.random
+    unvisited[start] = 0
+    frontier = [start]
+    while frontier:
+        k = int(rand() * len(frontier))
+        i = frontier[k]
+        order = next(batch, None)
+        if order is None:
+            batch = _random_orders(rng, orders)
+            order = next(batch)
+        a, b, c, d = order
+        if unvisited[i + a]: pass
+        elif unvisited[i + b]: a = b
+        elif unvisited[i + c]: a = c
+        elif unvisited[i + d]: a = d
+        else:
+            # Swap-remove: order doesn't matter, only which rooms are in the frontier
+            frontier[k] = frontier[-1]
+            frontier.pop()
+            continue
+        j = i + a
+        unvisited[j] = 0
+        cells[j - a // 2] = 0
+        frontier.append(j)
+    _open_rooms(cells, w, h)
+
+
+def _binary_tree(cells, w, h, rng, start):
+    """
+    Binary tree: every room opens either north or west. Biased (the top row
+    and left column are straight corridors) but needs only one random bit per room.
+    """
+    rooms_x = range(1, w - 1, 2)
+    per_row = len(rooms_x)
+    for y in range(1, h - 1, 2):
+        row = y * w
+        bits = rng.getrandbits(per_row)
+        for n, x in enumerate(rooms_x):
+            i = row + x
+            if y == 1:
+                if x > 1:
+                    cells[i - 1] = 0  # Top row: the only way is west
+            elif x == 1 or bits >> n & 1:
+                cells[i - w] = 0
+            else:
+                cells[i - 1] = 0
+    _open_rooms(cells, w, h)
+
+
+ALGORITHMS = {
+    "backtracker": _backtracker,
+    "prim": _prim,
+    "binary_tree": _binary_tree,
+}
+
+
+def generate_maze(w, h, seed=None, algorithm="backtracker", start=(1, 1)):
+    """
+    Returns a w x h OccupancyGrid holding a perfect maze (every open tile is
+    reachable from every other one by exactly one path). The same seed and
+    algorithm always give the same maze. `start` must be a room (odd x and y).
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown maze algorithm {algorithm!r}, expected one of {sorted(ALGORITHMS)}")
+    grid = OccupancyGrid(w, h, fill=WALL)
+    if w >= 3 and h >= 3:
+        ALGORITHMS[algorithm](grid.cells, w, h, random.Random(seed), start[1] * w + start[0])
+        grid.version += 1
+    return grid
+
+
+def sample_open_tiles(grid, count, rng, exclude=()):
+    """
+    Picks `count` different open tiles of a maze at random, skipping `exclude`.
+    In a perfect maze every open tile is reachable, so tiles are drawn by
+    rejection sampling over the grid instead of listing every open tile first.
+    """
+    w, h, cells, mask = grid.w, grid.h, grid.cells, grid.mask
+    picked = []
+    taken = set(exclude)
+    for _ in range(count * 1000):
+        if len(picked) == count:
+            return picked
+        x, y = rng.randrange(w), rng.randrange(h)
+        if not cells[y * w + x] & mask and (x, y) not in taken:
+            taken.add((x, y))
+            picked.append((x, y))
+    if len(picked) < count:
+        raise ValueError(f"Could not find {count} open tiles in the maze")
+    return picked
+
+
+class ChunkedMaze:
+    """
+    An endless maze, split into square chunks that are generated on demand
+    from the seed and the chunk's coordinates. Each chunk is a perfect maze of
+    its own. A few doors through its west and north edges join it to its
+    neighbours, so the whole world is connected.
+
+    Chunks are kept in an LRU cache holding at most `max_bytes` of tiles. An
+    evicted chunk is simply generated again, identically, the next time it is
+    needed, so memory stays flat however far the player goes. is_blocked() and
+    flags_at() match OccupancyGrid, so players can move through a ChunkedMaze
+    like any other obstacle grid.
+    """
+
+    def __init__(self, seed, chunk_size=MAZE_CHUNK_SIZE, max_bytes=MAZE_CHUNK_CACHE_BYTES,
+                 algorithm="backtracker", doors_per_edge=2):
+        if chunk_size % 2:
+            raise ValueError("chunk_size must be even so rooms line up across chunks")
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.algorithm = algorithm
+        self.doors_per_edge = doors_per_edge
+        # Never fewer than the 4 x 4 chunks that can surround the view
+        self.max_chunks = max(16, max_bytes // (chunk_size * chunk_size))
+        self.chunks = OrderedDict()  # (cx, cy) -> bytearray of chunk_size * chunk_size flags
+        self.generated = 0  # How many chunks have been generated, evicted ones included
+        self.mask = ALL_LAYERS
+        self.version = 0  # The maze never changes
+        self._last_key = None
+        self._last_cells = None
+
+    def _generate(self, cx, cy):
+        n = self.chunk_size
+        # Rooms sit on odd tiles; the chunk's west column and north row are walls
+        # shared with the neighbouring chunks
+        grid = generate_maze(n + 1, n + 1, f"{self.seed}:{cx}:{cy}", self.algorithm)
+        cells = bytearray(n * n)
+        for y in range(n):
+            cells[y * n:y * n + n] = grid.cells[y * (n + 1):y * (n + 1) + n]
+
+        rng = random.Random(f"{self.seed}:{cx}:{cy}:doors")
+        for y in rng.sample(range(1, n, 2), self.doors_per_edge):
+            cells[y * n] = 0  # West edge, to chunk (cx - 1, cy)
+        for x in rng.sample(range(1, n, 2), self.doors_per_edge):
+            cells[x] = 0  # North edge, to chunk (cx, cy - 1)
+        self.generated += 1
+        return cells
+
+    def chunk(self, cx, cy):
+        """Returns the tiles of chunk (cx, cy), generating it if it isn't resident."""
+        key = (cx, cy)
+        cells = self.chunks.get(key)
+        if cells is None:
+            cells = self._generate(cx, cy)
+            self.chunks[key] = cells
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        self._last_key, self._last_cells = key, cells
+        return cells
+
+    def ensure_area(self, x1, y1, x2, y2):
+        """Makes every chunk overlapping the tiles x1 <= x < x2, y1 <= y < y2 resident."""
+        n = self.chunk_size
+        for cy in range(y1 // n, (y2 - 1) // n + 1):
+            for cx in range(x1 // n, (x2 - 1) // n + 1):
+                self.chunk(cx, cy)
+
+    def flags_at(self, x, y):
+        n = self.chunk_size
+        key = (x // n, y // n)
+        # Consecutive lookups are nearly always in the same chunk
+        cells = self._last_cells if key == self._last_key else self.chunk(*key)
+        return cells[y % n * n + x % n]
+
+    def is_blocked(self, x, y):
+        return self.flags_at(x, y) & self.mask != 0
+
+    def __contains__(self, pos):
+        return self.is_blocked(pos[0], pos[1])
@@ -0,0 +1,72 @@
+# pathfinding.py
+
+# Neighbour order used when several steps are equally good
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class FlowField:
+    """
+    A breadth-first distance map from one target tile (usually the player)
+    over an OccupancyGrid. It is rebuilt only when the target moves to a new
+    tile or the grid's version changes, so any number of chasers can share it
+    and each one picks its next step in O(1).
+    """
+
+    def __init__(self, obstacles):
+        self.obstacles = obstacles
+        self.distances = []  # Steps to the target per cell, -1 if unreachable
+        self._target = None
+        self._version = None
+
+    def _rebuild(self, target):
+        grid = self.obstacles
+        w, h, cells, mask = grid.w, grid.h, grid.cells, grid.mask
+        distances = [-1] * (w * h)
+        self.distances = distances
+        self._target = target
+        self._version = grid.version
+
+        tx, ty = target
+        if not (0 <= tx < w and 0 <= ty < h):
+            return
+        start = ty * w + tx
+        distances[start] = 0
+        queue = [start]
+        for i in queue:  # The list grows while we walk it
+            d = distances[i] + 1
+            x = i % w
+            if x + 1 < w and distances[i + 1] < 0 and not cells[i + 1] & mask:
+                distances[i + 1] = d
+                queue.append(i + 1)
+            if x > 0 and distances[i - 1] < 0 and not cells[i - 1] & mask:
+                distances[i - 1] = d
+                queue.append(i - 1)
+            if i + w < w * h and distances[i + w] < 0 and not cells[i + w] & mask:
+                distances[i + w] = d
+                queue.append(i + w)
+            if i >= w and distances[i - w] < 0 and not cells[i - w] & mask:
+                distances[i - w] = d
+                queue.append(i - w)
+
+    def distance(self, x, y, target):
+        """Returns the number of steps from (x, y) to the target, or -1 if it can't be reached."""
+        if target != self._target or self.obstacles.version != self._version:
+            self._rebuild(target)
+        w, h = self.obstacles.w, self.obstacles.h
+        if 0 <= x < w and 0 <= y < h:
+            return self.distances[y * w + x]
+        return -1
+
+    def next_step(self, x, y, target, preferred=DIRECTIONS):
+        """
+        Returns the (dx, dy) that brings (x, y) one step closer to the target,
+        trying directions in `preferred` order first. Returns None if the target
+        can't be reached from (x, y).
+        """
+        here = self.distance(x, y, target)
+        if here <= 0:
+            return None
+        for dx, dy in preferred:
+            if self.distance(x + dx, y + dy, target) == here - 1:
+                return dx, dy
+        return None
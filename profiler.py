@@ -0,0 +1,184 @@
+# profiler.py
+import time
+from collections import deque
+import pygame
+from settings import *
+from fonts import get_font, render_text
+
+# Phases of a frame of Game.run, in the order they happen
+PHASES = ("events", "update", "draw", "present", "wait")
+PHASE_COLORS = {
+    "events": BLUE,
+    "update": GREEN,
+    "draw": YELLOW,
+    "present": RED,
+    "wait": DARK_GRAY,
+}
+
+# Entity methods that get timed while the profiler is on
+TIMED_METHODS = ("update", "draw", "step")
+
+
+class FrameProfiler:
+    """
+    Times each phase of every frame with perf_counter_ns and draws the result
+    as an overlay: a rolling frame-time graph, a bar per phase, and the
+    entity update/draw calls that cost the most.
+
+    While it is off, mark() returns straight away and no entity is timed, so
+    the game pays one attribute check per phase.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.history = deque(maxlen=PROFILER_HISTORY)  # Total frame time (ns) of recent frames
+        self.current = dict.fromkeys(PHASES, 0)  # Phase times of the frame in progress
+        self.totals = dict.fromkeys(PHASES, 0)  # Phase times since the last refresh
+        self.calls = {}  # "Class.method" -> [total ns, calls] since the last refresh (cleared in place)
+        self.frames = 0
+        self.last_mark = 0
+        self.lines = []  # Text of the overlay, rebuilt on every refresh
+        self.phase_ms = dict.fromkeys(PHASES, 0.0)
+        self._patched = {}  # (class, method name) -> original function
+        self._level = None
+
+    # --- Control ---
+    def toggle(self, level=None):
+        if self.enabled:
+            self.enabled = False
+            self._restore_methods()
+        else:
+            self.enabled = True
+            self.history.clear()
+            self._reset_window()
+            self.last_mark = time.perf_counter_ns()
+            self._level = None
+            self.watch(level)
+
+    def watch(self, level):
+        """Starts timing the entities of `level` (call it whenever the current level changes)."""
+        if not self.enabled or level is None or level is self._level:
+            return
+        self._level = level
+        for obj in _entities(level):
+            for name in TIMED_METHODS:
+                self._patch(type(obj), name)
+
+    def _patch(self, cls, name):
+        # Wrap the method where it is defined, so subclasses are timed too
+        cls = next((klass for klass in cls.__mro__ if name in klass.__dict__), None)
+        if cls is None or cls is object or (cls, name) in self._patched:
+            return
+        original = cls.__dict__[name]
+        if not callable(original):
+            return
+        label = f"{cls.__name__}.{name}"
+        calls = self.calls
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                entry = calls.get(label)
+                if entry is None:
+                    entry = calls[label] = [0, 0]
+                entry[0] += clock() - start
+                entry[1] += 1
+
+        timed.__wrapped__ = original
+        self._patched[(cls, name)] = original
+        setattr(cls, name, timed)
+
+    def _restore_methods(self):
+        # Timers already scheduled with a timed method keep it until they
+        # reschedule, which is harmless: it just calls the original
+        for (cls, name), original in self._patched.items():
+            setattr(cls, name, original)
+        self._patched = {}
+        self._level = None
+
+    def _reset_window(self):
+        self.totals = dict.fromkeys(PHASES, 0)
+        self.current = dict.fromkeys(PHASES, 0)
+        self.calls.clear()
+        self.frames = 0
+
+    # --- Timing ---
+    def mark(self, phase):
+        """Adds the time since the previous mark to `phase` of the current frame."""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        """Closes the current frame (call it once per drawn frame, after presenting)."""
+        if not self.enabled:
+            return
+        current = self.current
+        self.history.append(sum(current.values()))
+        for phase, ns in current.items():
+            self.totals[phase] += ns
+            current[phase] = 0
+        self.frames += 1
+        if self.frames >= PROFILER_REFRESH:
+            self._refresh()
+
+    def _refresh(self):
+        """Turns the totals since the last refresh into per-frame averages for the overlay."""
+        frames = self.frames
+        self.phase_ms = {phase: ns / frames / 1e6 for phase, ns in self.totals.items()}
+        top = sorted(self.calls.items(), key=lambda item: item[1][0], reverse=True)[:PROFILER_TOP_N]
+        self.lines = [f"{label}: {ns / frames / 1000:.1f}us x{calls / frames:.0f}" for label, (ns, calls) in top]
+        self._reset_window()
+
+    # --- Overlay ---
+    def draw(self, surface):
+        """Draws the overlay in the top-right corner. Returns the rect it covers."""
+        font = get_font(None, 20)
+        width, graph_h = 260, 60
+        lines = self.lines
+        height = 10 + graph_h + 10 + len(PHASES) * 16 + 6 + len(lines) * 16 + 6
+        rect = pygame.Rect(surface.get_width() - width - 10, 10, width, height)
+        surface.fill(BLACK, rect)
+        pygame.draw.rect(surface, GRAY, rect, 1)
+        x, y = rect.x + 8, rect.y + 10
+
+        # Frame-time graph, scaled so the 1/FPS budget is the middle line
+        budget_ns = 1e9 / FPS
+        bar_w = max(1, (width - 16) // PROFILER_HISTORY)
+        for i, ns in enumerate(self.history):
+            h = min(graph_h, int(ns / (2 * budget_ns) * graph_h))
+            color = GREEN if ns <= budget_ns else RED
+            pygame.draw.rect(surface, color, (x + i * bar_w, y + graph_h - h, bar_w, h))
+        pygame.draw.line(surface, WHITE, (x, y + graph_h // 2), (x + width - 16, y + graph_h // 2))
+        y += graph_h + 10
+
+        # One bar per phase, scaled to the frame budget
+        budget_ms = budget_ns / 1e6
+        for phase in PHASES:
+            ms = self.phase_ms[phase]
+            bar = min(120, int(ms / budget_ms * 120))
+            pygame.draw.rect(surface, PHASE_COLORS[phase], (x, y + 3, bar, 10))
+            surface.blit(render_text(font, f"{phase} {ms:.2f}ms", WHITE), (x + 126, y))
+            y += 16
+        y += 6
+
+        for line in lines:
+            surface.blit(render_text(font, line, WHITE), (x, y))
+            y += 16
+        return rect
+
+
+def _entities(level):
+    """Objects of a level that draw themselves: the player, doors, enemies, gears, batches..."""
+    found = []
+    for value in vars(level).values():
+        items = value if isinstance(value, (list, tuple)) else (value,)
+        for obj in items:
+            if hasattr(type(obj), "draw") and not isinstance(obj, type):
+                found.append(obj)
+    return found
@@ -0,0 +1,251 @@
+# replay.py
+"""
+Records and plays back runs of a level. A replay holds the level, its seed,
+the keys held on every tick (run-length encoded) and a checksum of the
+level's state every few ticks, so playback can prove it matches the run.
+
+    python replay.py run.replay ...   # Play replays back at full speed and verify them
+"""
+import sys
+import time
+import pygame
+from settings import *
+
+MAGIC = b"TRPL"
+VERSION = 1
+
+# Keys a replay can hold, one bit each. Bits 0-4 are held keys; the same keys
+# shifted up by PRESS_SHIFT are the KEYDOWN events delivered before the tick.
+KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+PRESS_SHIFT = len(KEYS)
+
+
+class ReplayDesync(Exception):
+    """Raised when a replay's state stops matching its recorded checksums."""
+
+    def __init__(self, tick, expected, actual):
+        super().__init__(f"Replay desynced at tick {tick}: expected checksum {expected:08x}, got {actual:08x}")
+        self.tick = tick
+        self.expected = expected
+        self.actual = actual
+
+
+def held_keys(pressed):
+    """The replayable keys held in `pressed` (as returned by controls.get_pressed())."""
+    return frozenset(key for key in KEYS if pressed[key])
+
+
+def encode_keys(held, presses=()):
+    """Packs held keys and this tick's presses (collections of key constants) into one input state."""
+    state = 0
+    for bit, key in enumerate(KEYS):
+        if key in held:
+            state |= 1 << bit
+        if key in presses:
+            state |= 1 << (bit + PRESS_SHIFT)
+    return state
+
+
+def decode_keys(state):
+    """Returns (held, presses) as frozensets of key constants."""
+    held = frozenset(key for bit, key in enumerate(KEYS) if state >> bit & 1)
+    presses = frozenset(key for bit, key in enumerate(KEYS) if state >> (bit + PRESS_SHIFT) & 1)
+    return held, presses
+
+
+def level_classes():
+    """Every level a replay can name, by class name."""
+    from Game import LEVEL_FACTORIES
+    from levels.level_endless import EndlessMaze
+    return {cls.__name__: cls for cls in LEVEL_FACTORIES + (EndlessMaze,)}
+
+
+class Replay:
+    """
+    A recorded run. `runs` is a list of (ticks, state) pairs: the input state
+    (see encode_keys) held for that many ticks in a row. `checksums` holds the
+    level's state_checksum() after every `checksum_interval` ticks, and after
+    the last tick.
+    """
+
+    def __init__(self, level, seed, runs=None, checksums=None, checksum_interval=REPLAY_CHECKSUM_INTERVAL):
+        self.level = level  # Class name of the level
+        self.seed = seed
+        self.runs = runs if runs is not None else []
+        self.checksums = checksums if checksums is not None else []
+        self.checksum_interval = checksum_interval
+
+    @property
+    def ticks(self):
+        return sum(count for count, _ in self.runs)
+
+    def checkpoints(self):
+        """The ticks after which checksums were taken, in order."""
+        total = self.ticks
+        ticks = list(range(self.checksum_interval, total + 1, self.checksum_interval))
+        if total % self.checksum_interval:
+            ticks.append(total)
+        return ticks
+
+    def states(self):
+        """Yields the input state of every tick."""
+        for count, state in self.runs:
+            for _ in range(count):
+                yield state
+
+    # --- Encoding ---
+    def to_bytes(self):
+        name = self.level.encode("ascii")
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        out.append(len(name))
+        out += name
+        _write_varint(out, self.seed)
+        _write_varint(out, self.checksum_interval)
+        _write_varint(out, len(self.runs))
+        for count, state in self.runs:
+            _write_varint(out, count)
+            _write_varint(out, state)
+        _write_varint(out, len(self.checksums))
+        for checksum in self.checksums:
+            out += checksum.to_bytes(4, "little")
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a replay file")
+        if data[4] != VERSION:
+            raise ValueError(f"Unsupported replay version {data[4]}")
+        pos = 6 + data[5]
+        level = data[6:pos].decode("ascii")
+        seed, pos = _read_varint(data, pos)
+        interval, pos = _read_varint(data, pos)
+        count, pos = _read_varint(data, pos)
+        runs = []
+        for _ in range(count):
+            ticks, pos = _read_varint(data, pos)
+            state, pos = _read_varint(data, pos)
+            runs.append((ticks, state))
+        count, pos = _read_varint(data, pos)
+        checksums = [int.from_bytes(data[pos + 4 * i:pos + 4 * i + 4], "little") for i in range(count)]
+        return cls(level, seed, runs, checksums, interval)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    # --- Playback ---
+    def play(self, verify=True, draw=False):
+        """
+        Plays the replay back through a Simulator as fast as possible and
+        returns the simulator. With `verify`, the level's checksum is compared
+        at every checkpoint and ReplayDesync is raised on the first mismatch.
+        """
+        from simulator import Simulator
+        level_cls = level_classes()[self.level]
+        sim = Simulator(lambda: level_cls(self.seed), draw=draw)
+        checkpoints = dict(zip(self.checkpoints(), self.checksums)) if verify else {}
+        for state in self.states():
+            held, presses = decode_keys(state)
+            sim.step(held, presses)
+            expected = checkpoints.get(sim.ticks)
+            if expected is not None:
+                actual = sim.level.state_checksum()
+                if actual != expected:
+                    raise ReplayDesync(sim.ticks, expected, actual)
+        return sim
+
+
+class Recorder:
+    """
+    Builds a Replay while a level is played. Call record() once per level
+    update, right before it, with the keys held and the keys pressed since
+    the previous update, and tick_done() right after it.
+    """
+
+    def __init__(self, level, checksum_interval=REPLAY_CHECKSUM_INTERVAL):
+        self.level = level
+        self.replay = Replay(type(level).__name__, level.seed, checksum_interval=checksum_interval)
+        self.ticks = 0
+
+    def record(self, held, presses=()):
+        state = encode_keys(held, presses)
+        runs = self.replay.runs
+        if runs and runs[-1][1] == state:
+            runs[-1] = (runs[-1][0] + 1, state)
+        else:
+            runs.append((1, state))
+
+    def tick_done(self):
+        self.ticks += 1
+        if self.ticks % self.replay.checksum_interval == 0:
+            self.replay.checksums.append(self.level.state_checksum())
+
+    def finish(self):
+        """Returns the finished Replay, with a final checksum if the last tick wasn't a checkpoint."""
+        if self.ticks % self.replay.checksum_interval:
+            self.replay.checksums.append(self.level.state_checksum())
+        return self.replay
+
+
+def record(level_factory, inputs, checksum_interval=REPLAY_CHECKSUM_INTERVAL):
+    """
+    Plays `inputs` (held-key sets, one per tick) through a Simulator and
+    returns the Replay of the run. Stops early if the level is completed.
+    """
+    from simulator import Simulator
+    sim = Simulator(level_factory)
+    recorder = Recorder(sim.level, checksum_interval)
+    for held in inputs:
+        held = frozenset(held)
+        recorder.record(held, held - sim.held)
+        sim.step(held)
+        recorder.tick_done()
+        if sim.level.is_complete:
+            break
+    return recorder.finish()
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python replay.py REPLAY...")
+        return
+    for path in sys.argv[1:]:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        try:
+            replay.play()
+        except ReplayDesync as e:
+            print(f"{path}: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {replay.level} seed {replay.seed}, {replay.ticks} ticks verified "
+              f"in {elapsed:.2f}s ({replay.ticks / elapsed:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# scheduler.py
+import copy
+
+
+class TimerWheel:
+    """
+    Calls functions at a given simulation tick.
+    Timers are kept in a ring of slots indexed by tick % size, so advancing one
+    tick only looks at a single slot, and nothing is paid per frame for timers
+    that are not due yet. Delays longer than the ring simply wait for a later lap.
+    """
+
+    def __init__(self, size=512):
+        self.now = 0
+        self.size = size
+        self.slots = [[] for _ in range(size)]
+
+    def __deepcopy__(self, memo):
+        # Most slots are empty, so only the ones holding timers are copied
+        wheel = TimerWheel.__new__(TimerWheel)
+        memo[id(self)] = wheel
+        wheel.now, wheel.size = self.now, self.size
+        wheel.slots = [copy.deepcopy(slot, memo) if slot else [] for slot in self.slots]
+        return wheel
+
+    def call_at(self, tick, callback, *args):
+        """Schedules callback(*args) for the given tick (or the next tick if it has passed)."""
+        tick = max(tick, self.now + 1)
+        self.slots[tick % self.size].append((tick, callback, args))
+
+    def call_later(self, delay, callback, *args):
+        """Schedules callback(*args) to run `delay` ticks from now."""
+        self.call_at(self.now + delay, callback, *args)
+
+    def advance(self):
+        """
+        Moves to the next tick and runs every timer due on it.
+        Returns the non-None values the callbacks returned (e.g. "reset").
+        """
+        self.tick()
+        return self.run_due()
+
+    def tick(self):
+        """Moves to the next tick without running any timers yet (see run_due)."""
+        self.now += 1
+
+    def run_due(self):
+        """
+        Runs every timer due on the current tick.
+        Levels call tick() at the start of an update and run_due() at the point
+        where their timed objects used to be updated, so the order is unchanged.
+        Returns the non-None values the callbacks returned (e.g. "reset").
+        """
+        index = self.now % self.size
+        slot = self.slots[index]
+        if not slot:
+            return []
+
+        due = [timer for timer in slot if timer[0] <= self.now]
+        if len(due) == len(slot):
+            self.slots[index] = []
+        else:
+            self.slots[index] = [timer for timer in slot if timer[0] > self.now]
+
+        results = []
+        for _, callback, args in due:
+            result = callback(*args)
+            if result is not None:
+                results.append(result)
+        return results
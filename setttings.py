@@ -4,7 +4,34 @@
 TILE = 32
 VIEW_W, VIEW_H = 20, 15
 WIDTH, HEIGHT = VIEW_W * TILE, VIEW_H * TILE
-FPS = 60
+FPS = 60  # Simulation rate: every level update is one tick at this rate
+RENDER_FPS = 0  # Cap on frames drawn per second (0 = as fast as the machine allows)
+MAX_CATCH_UP_STEPS = 5  # Most simulation ticks to run before a draw when running behind
+# Only push changed screen regions to the display instead of flipping every frame
+DIRTY_RECTS = True
+
+# Levels with more tiles than this draw their visible walls each frame
+# instead of keeping the whole map pre-rendered on one surface
+WALL_LAYER_MAX_TILES = 100 * 100
+
+# Endless maze: tiles per chunk side (even), and memory kept for generated chunks
+MAZE_CHUNK_SIZE = 32
+MAZE_CHUNK_CACHE_BYTES = 64 * 1024
+
+# Levels with at least this many moving hazards step them as one NumPy batch
+# (below this, scheduling each hazard on its own is cheaper)
+BATCH_MIN_ENTITIES = 1000
+
+# Save a replay of every level played to REPLAY_DIR (see replay.py)
+RECORD_REPLAYS = False
+REPLAY_DIR = "replays"
+# Replays store a checksum of the level's state every this many ticks
+REPLAY_CHECKSUM_INTERVAL = 60
+
+# Frame profiler overlay (see profiler.py), toggled in game with F3
+PROFILER_HISTORY = 120  # Frames shown in the frame-time graph
+PROFILER_TOP_N = 8  # Most expensive entity calls listed
+PROFILER_REFRESH = 30  # Frames between refreshes of the overlay's numbers
 
 # --- GRID SIZES (can be overridden by each level) ---
 # Default grid size, used by level 1
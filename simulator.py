@@ -0,0 +1,123 @@
+# simulator.py
+"""
+Runs levels without a window: builds a level, feeds it scripted input and
+steps update() as fast as the CPU allows, with no display and no clock.
+
+    python simulator.py              # Ticks per second for every level, with random input
+    python simulator.py --draw       # The same, drawing every frame off-screen
+"""
+import os
+import argparse
+import random
+import time
+
+# No window is ever opened, so SDL doesn't need a real video device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import controls
+from settings import *
+
+ARROW_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+class Simulator:
+    """
+    Steps one level headlessly. Input is given per tick as the set of keys held
+    on that tick: the level sees them through controls.get_pressed(), and a
+    key that wasn't held on the previous tick is also sent to handle_event()
+    as a KEYDOWN (and a released one as a KEYUP), just as the game does.
+
+    With `draw`, every tick is also drawn into an off-screen surface (or only
+    every `draw_every` ticks); without it nothing is ever drawn.
+    """
+
+    def __init__(self, level_factory, draw=False, draw_every=1):
+        pygame.init()  # Fonts and surfaces work without a display mode
+        self.input = controls.ScriptedInput()
+        self.held = frozenset()
+        self.ticks = 0
+        self.surface = pygame.Surface((WIDTH, HEIGHT)) if draw else None
+        self.draw_every = draw_every
+        # Built with this simulator's input in place, in case a level reads it while setting up
+        previous = controls.set_source(self.input)
+        try:
+            self.level = level_factory()
+        finally:
+            controls.set_source(previous)
+
+    def step(self, held=(), presses=None):
+        """
+        Runs one tick of the level with the keys in `held` held down. `presses`
+        are the KEYDOWN events to deliver first; by default, the keys that
+        weren't held on the previous tick.
+        """
+        held = held if isinstance(held, frozenset) else frozenset(held)
+        level = self.level
+        previous = controls.set_source(self.input)
+        try:
+            if presses is None:
+                presses = held - self.held
+            for key in presses:
+                level.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key))
+            if held != self.held:
+                for key in self.held - held:
+                    level.handle_event(pygame.event.Event(pygame.KEYUP, key=key))
+                self.held = held
+                self.input.state = controls.KeyState(held)
+            level.update()
+        finally:
+            controls.set_source(previous)
+        self.ticks += 1
+        if self.surface is not None and self.ticks % self.draw_every == 0:
+            level.draw(self.surface)
+
+    def run(self, inputs, until_complete=True):
+        """
+        Steps the level once for every entry of `inputs` (an iterable of held-key
+        sets). Stops early when the level is complete, unless `until_complete` is False.
+        Returns the number of ticks run.
+        """
+        start = self.ticks
+        for held in inputs:
+            self.step(held)
+            if until_complete and self.level.is_complete:
+                break
+        return self.ticks - start
+
+
+def random_inputs(rng, ticks, keys=ARROW_KEYS + (pygame.K_SPACE,), hold=(1, 30)):
+    """
+    A random input stream: one key (or none) at a time, each held for a
+    random number of ticks in the `hold` range. Meant for smoke tests and bots.
+    """
+    held = frozenset()
+    left = 0
+    for _ in range(ticks):
+        if left == 0:
+            choice = rng.choice(keys + (None,))
+            held = frozenset() if choice is None else frozenset((choice,))
+            left = rng.randint(*hold)
+        left -= 1
+        yield held
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step every level headlessly and report ticks per second.")
+    parser.add_argument("--ticks", type=int, default=20000, help="ticks to run per level")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random input")
+    parser.add_argument("--draw", action="store_true", help="draw every frame into an off-screen surface")
+    args = parser.parse_args()
+
+    from Game import LEVEL_FACTORIES
+    for index, factory in enumerate(LEVEL_FACTORIES):
+        sim = Simulator(factory, draw=args.draw)
+        inputs = random_inputs(random.Random(args.seed), args.ticks)
+        start = time.perf_counter()
+        ticks = sim.run(inputs, until_complete=False)
+        elapsed = time.perf_counter() - start
+        print(f"Level {index + 1}: {ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
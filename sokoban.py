@@ -0,0 +1,286 @@
+# sokoban.py
+"""
+Solver and validator for the boulder-and-plate puzzles (Level5, and the
+boulder part of Level8). Finds the smallest number of pushes that puts a
+boulder on every pressure plate, or reports that the layout can't be solved.
+
+    python sokoban.py                       # Solve the layouts shipped in the game
+    python sokoban.py --random 500 --seed 1  # Validate 500 random layouts in Level5's room
+"""
+import argparse
+import heapq
+import random
+import time
+from settings import *
+
+INF = 1 << 30
+
+
+class Puzzle:
+    """
+    A boulder puzzle on a grid, stored as flat tile indices (y * w + x).
+    `walls` is anything with w, h and is_blocked(x, y) (e.g. an OccupancyGrid).
+    `blockers` are extra tiles that stop boulders but not the player (like Level8's mirrors).
+    The outermost ring of tiles is treated as wall.
+    """
+
+    def __init__(self, walls, boulders, plates, player, blockers=()):
+        self.w, self.h = w, h = walls.w, walls.h
+        self.open = bytearray(w * h)  # 1 where the player can walk
+        for y in range(1, h - 1):
+            for x in range(1, w - 1):
+                if not walls.is_blocked(x, y):
+                    self.open[y * w + x] = 1
+        self.box_open = bytearray(self.open)  # 1 where a boulder can be
+        for x, y in blockers:
+            self.box_open[y * w + x] = 0
+        self.boulders = tuple(sorted(y * w + x for x, y in boulders))
+        self.plates = tuple(sorted(y * w + x for x, y in plates))
+        self.player = player[1] * w + player[0]
+
+    @classmethod
+    def from_level(cls, level):
+        """Builds the puzzle from a level's walls, boulders, plates and player (and mirrors, if any)."""
+        blockers = [(m.x, m.y) for m in getattr(level, "mirrors", ())]
+        blockers += [gear.get_axle_tile() for gear in getattr(level, "gears", ())]
+        return cls(level.walls,
+                   [(b.x, b.y) for b in level.boulders],
+                   [(p.x, p.y) for p in level.plates],
+                   (level.player.x, level.player.y),
+                   blockers)
+
+    def xy(self, index):
+        return index % self.w, index // self.w
+
+
+class Solution:
+    """The result of solve(): the pushes made, in order, as (x, y, dx, dy) of the boulder pushed."""
+
+    def __init__(self, pushes, expanded):
+        self.pushes = pushes
+        self.expanded = expanded  # States taken off the A* queue
+
+    def __len__(self):
+        return len(self.pushes)
+
+
+def pull_distances(puzzle, goal):
+    """
+    Returns, for every tile, the fewest pushes that move a lone boulder from
+    that tile to `goal` (INF if it never can), found by pulling it backwards.
+    """
+    w, box_open, player_open = puzzle.w, puzzle.box_open, puzzle.open
+    dist = [INF] * (w * puzzle.h)
+    dist[goal] = 0
+    queue = [goal]
+    for i in queue:
+        d = dist[i] + 1
+        for step in (1, -1, w, -w):
+            # The boulder came from i + step, pushed by a player standing at i + 2 * step
+            j = i + step
+            if box_open[j] and player_open[j + step] and dist[j] == INF:
+                dist[j] = d
+                queue.append(j)
+    return dist
+
+
+def _matching_cost(distances, boulders):
+    """
+    Smallest total of pull distances when each plate gets its own boulder
+    (a min-cost bipartite matching, by dynamic programming over boulder subsets).
+    Returns INF if some plate can't be reached by any free boulder.
+    """
+    n = len(boulders)
+    best = {0: 0}
+    for dist in distances:
+        nxt = {}
+        for used, cost in best.items():
+            for k in range(n):
+                bit = 1 << k
+                if used & bit:
+                    continue
+                d = dist[boulders[k]]
+                if d == INF:
+                    continue
+                total = cost + d
+                key = used | bit
+                if total < nxt.get(key, INF):
+                    nxt[key] = total
+        if not nxt:
+            return INF
+        best = nxt
+    return min(best.values())
+
+
+def _zobrist_table(size, seed=0x5EED):
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(size)]
+
+
+def solve(puzzle, max_states=200000):
+    """
+    Finds the minimal number of pushes with A*. States are the set of boulder
+    tiles plus the area the player can reach, hashed with Zobrist keys so a
+    push updates the hash in O(1). Boulders are never pushed onto dead tiles
+    (tiles from which no plate can be reached). The heuristic is the min-cost
+    matching of boulders to plates, which never overestimates, so the first
+    solution found is optimal.
+    Returns a Solution, or None if there is none (or max_states ran out).
+    """
+    w = puzzle.w
+    plates = puzzle.plates
+    if len(puzzle.boulders) < len(plates):
+        return None
+
+    distances = [pull_distances(puzzle, goal) for goal in plates]
+    live = bytearray(1 if any(d[i] < INF for d in distances) else 0 for i in range(w * puzzle.h))
+    # With spare boulders, one may end up anywhere, so dead tiles only matter when every boulder is needed
+    prune_dead = len(puzzle.boulders) == len(plates)
+    if prune_dead and not all(live[b] for b in puzzle.boulders):
+        return None
+
+    zobrist = _zobrist_table(w * puzzle.h)
+    player_open, box_open = puzzle.open, puzzle.box_open
+    steps = (1, -1, w, -w)
+    heuristics = {}  # Boulder hash -> matching cost (it doesn't depend on the player)
+
+    def reach(start, boulders):
+        """
+        Flood-fills the tiles the player can walk to without pushing. Returns a
+        bytearray that is 0 on those tiles (and on walls and boulders), and the
+        smallest reachable index, which identifies the area.
+        """
+        unvisited = bytearray(player_open)
+        for b in boulders:
+            unvisited[b] = 0
+        unvisited[start] = 0
+        queue = [start]
+        for i in queue:
+            for step in steps:
+                j = i + step
+                if unvisited[j]:
+                    unvisited[j] = 0
+                    queue.append(j)
+        return unvisited, min(queue)
+
+    def heuristic(boulders, key):
+        h = heuristics.get(key)
+        if h is None:
+            h = heuristics[key] = _matching_cost(distances, boulders)
+        return h
+
+    start_boulders = puzzle.boulders
+    start_hash = 0
+    for b in start_boulders:
+        start_hash ^= zobrist[b]
+    area, area_id = reach(puzzle.player, start_boulders)
+    start_key = (start_hash, area_id)
+    h0 = heuristic(start_boulders, start_hash)
+    if h0 == INF:
+        return None
+
+    parents = {start_key: None}  # State key -> (previous key, push)
+    best_g = {start_key: 0}
+    # Entries: f, -g (so deeper states win ties), insertion counter, then the state itself
+    queue = [(h0, 0, 0, start_key, start_boulders, start_hash, area)]
+    counter = 1
+    expanded = 0
+    plate_set = set(plates)
+
+    while queue:
+        f, g, _, key, boulders, zhash, area = heapq.heappop(queue)
+        g = -g
+        if g > best_g.get(key, INF):
+            continue  # A cheaper way to this state was already expanded
+        expanded += 1
+        if plate_set.issubset(boulders):
+            pushes = []
+            while parents[key] is not None:
+                key, push = parents[key]
+                pushes.append(push)
+            pushes.reverse()
+            return Solution(pushes, expanded)
+        if expanded > max_states:
+            return None
+
+        occupied = set(boulders)
+        for k, b in enumerate(boulders):
+            for step in steps:
+                target = b + step
+                behind = b - step  # Where the player has to stand
+                if area[behind] or not player_open[behind] or behind in occupied:
+                    continue
+                if not box_open[target] or target in occupied:
+                    continue
+                if prune_dead and not live[target]:
+                    continue
+                new_boulders = tuple(sorted(boulders[:k] + (target,) + boulders[k + 1:]))
+                new_hash = zhash ^ zobrist[b] ^ zobrist[target]
+                h = heuristic(new_boulders, new_hash)
+                if h == INF:
+                    continue
+                new_area, area_id = reach(b, new_boulders)
+                new_key = (new_hash, area_id)
+                if g + 1 >= best_g.get(new_key, INF):
+                    continue
+                best_g[new_key] = g + 1
+                x, y = puzzle.xy(b)
+                dx, dy = (step, 0) if abs(step) == 1 else (0, step // w)
+                parents[new_key] = (key, (x, y, dx, dy))
+                heapq.heappush(queue, (g + 1 + h, -(g + 1), counter, new_key, new_boulders, new_hash, new_area))
+                counter += 1
+    return None
+
+
+def random_puzzle(walls, boulders, rng, player=None):
+    """
+    Makes a random layout inside `walls` with the given number of boulders and
+    as many plates, all on different open tiles.
+    """
+    tiles = [(x, y) for y in range(1, walls.h - 1) for x in range(1, walls.w - 1)
+             if not walls.is_blocked(x, y)]
+    picked = rng.sample(tiles, 2 * boulders + (0 if player else 1))
+    player = player or picked.pop()
+    return Puzzle(walls, picked[:boulders], picked[boulders:], player)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve and validate the boulder puzzles.")
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="validate N random layouts in Level5's room instead of the game's layouts")
+    parser.add_argument("--boulders", type=int, default=3, help="boulders per random layout")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random layouts")
+    parser.add_argument("--max-states", type=int, default=200000, help="give up after this many states")
+    args = parser.parse_args()
+
+    from levels.level5 import Level5
+    if args.random:
+        rng = random.Random(args.seed)
+        walls = Level5().walls
+        start = time.perf_counter()
+        solved, pushes = 0, []
+        for _ in range(args.random):
+            solution = solve(random_puzzle(walls, args.boulders, rng), args.max_states)
+            if solution is not None:
+                solved += 1
+                pushes.append(len(solution))
+        elapsed = time.perf_counter() - start
+        print(f"{solved}/{args.random} layouts solvable in {elapsed:.2f}s "
+              f"({elapsed / args.random * 1000:.1f} ms each)")
+        if pushes:
+            print(f"pushes: min {min(pushes)}, max {max(pushes)}, mean {sum(pushes) / len(pushes):.1f}")
+        return
+
+    from levels.level8 import Level8
+    for name, level in (("Level5", Level5()), ("Level8", Level8())):
+        start = time.perf_counter()
+        solution = solve(Puzzle.from_level(level), args.max_states)
+        elapsed = (time.perf_counter() - start) * 1000
+        if solution is None:
+            print(f"{name}: no solution ({elapsed:.1f} ms)")
+        else:
+            print(f"{name}: {len(solution)} pushes, {solution.expanded} states, {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()